@@ -3,6 +3,7 @@
 from flask import abort, jsonify, make_response, request
 
 from api.v1.views import app_views
+from api.v1.views.pagination import collection
 from models import storage
 from models.amenity import Amenity
 
@@ -10,8 +11,7 @@ from models.amenity import Amenity
 @app_views.route('/amenities', methods=['GET'], strict_slashes=False)
 def get_amenities():
     """Retrieves list of all Amenity objects"""
-    a_amenities = [obj.to_dict() for obj in storage.all(Amenity).values()]
-    return jsonify(a_amenities)
+    return collection(Amenity)
 
 
 @app_views.route('/amenities/<amenity_id>', methods=['GET'],
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""
+The Batch Module, applying many creations, updates and deletions with a
+single save of the storage.
+"""
+from flask import jsonify, make_response, request
+
+from api.v1.views import app_views
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+classes = {"Amenity": Amenity, "City": City, "Place": Place,
+           "Review": Review, "State": State, "User": User}
+# keys a created object needs, in the order they are checked
+required_keys = {"Amenity": ["name"],
+                 "City": ["state_id", "name"],
+                 "Place": ["city_id", "user_id", "name"],
+                 "Review": ["place_id", "user_id", "text"],
+                 "State": ["name"],
+                 "User": ["email", "password"]}
+# classes of the objects the foreign keys refer to
+foreign_keys = {"state_id": State, "city_id": City, "place_id": Place,
+                "user_id": User}
+# keys an update leaves unchanged
+ignored_keys = {"Amenity": [], "City": ["state_id"],
+                "Place": ["user_id", "city_id"],
+                "Review": ["user_id", "place_id"],
+                "State": [], "User": ["email"]}
+
+
+@app_views.route('/batch', methods=['POST'], strict_slashes=False)
+def batch():
+    """
+    Applies a list of operations and saves the storage once.
+    Each operation is {"op": "create", "class": <name>, "data": {...}},
+    {"op": "update", "class": <name>, "id": <id>, "data": {...}} or
+    {"op": "delete", "class": <name>, "id": <id>}, validated as by the
+    endpoint of the single object.  The invalid operations are skipped and
+    the result of each operation is listed, in order, with its status.
+    If the save fails, every change is rolled back and the operations that
+    were applied are listed with a 500 status instead.
+    """
+    operations = request.get_json(silent=True)
+    if operations is None:
+        return make_response(jsonify({"error": "Not a JSON"}), 400)
+    if type(operations) is not list:
+        return make_response(jsonify({"error": "Not a list"}), 400)
+
+    results = [apply(operation) for operation in operations]
+    if any(result["status"] < 400 for result in results):
+        try:
+            storage.save()
+        except Exception as error:
+            storage.rollback()
+            message = "Not saved: " + type(error).__name__
+            for i, result in enumerate(results):
+                if result["status"] < 400:
+                    results[i] = {"status": 500, "error": message}
+            return make_response(jsonify(results), 500)
+    return jsonify(results)
+
+
+def apply(operation):
+    """Applies an operation without saving, returns its result"""
+    if type(operation) is not dict:
+        return {"status": 400, "error": "Not a JSON"}
+    cls_name = operation.get("class")
+    if cls_name not in classes:
+        return {"status": 400, "error": "Unknown class"}
+    data = operation.get("data", {})
+    if type(data) is not dict:
+        return {"status": 400, "error": "Not a JSON"}
+    op = operation.get("op")
+
+    if op == "create":
+        for key in required_keys[cls_name]:
+            if key not in data:
+                return {"status": 400, "error": "Missing " + key}
+            if key in foreign_keys and \
+                    storage.get(foreign_keys[key], data[key]) is None:
+                return {"status": 404, "error": "Not found"}
+        if "id" in data:
+            if type(data["id"]) is not str or not data["id"]:
+                return {"status": 400, "error": "Invalid id"}
+            if storage.get(classes[cls_name], data["id"]) is not None:
+                return {"status": 409, "error": "Already exists"}
+        try:
+            obj = classes[cls_name](**data)
+        except (TypeError, ValueError):
+            return {"status": 400, "error": "Invalid data"}
+        storage.new(obj)
+        return {"status": 201, "object": obj.to_dict()}
+
+    if op not in ("update", "delete"):
+        return {"status": 400, "error": "Unknown op"}
+    obj = storage.get(classes[cls_name], operation.get("id"))
+    if obj is None:
+        return {"status": 404, "error": "Not found"}
+    if op == "delete":
+        storage.delete(obj)
+        return {"status": 200}
+    ignored = ['id', 'created_at', 'updated_at'] + ignored_keys[cls_name]
+    for key, val in data.items():
+        if key not in ignored:
+            setattr(obj, key, val)
+    return {"status": 200, "object": obj.to_dict()}
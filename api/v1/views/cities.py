@@ -5,6 +5,7 @@ Module to handle all default RESTFul API actions for City objects.
 from flask import abort, jsonify, make_response, request
 
 from api.v1.views import app_views
+from api.v1.views.pagination import collection
 from models import storage
 from models.city import City
 from models.state import State
@@ -20,9 +21,7 @@ def get_cities(state_id):
     state = storage.get(State, state_id)
     if not state:
         abort(404)
-    cities_list = [obj.to_dict() for obj in storage.all(City).values()
-                   if obj.state_id == state_id]
-    return jsonify(cities_list)
+    return collection(City, "state_id", state_id)
 
 
 @app_views.route('/cities/<city_id>', methods=['GET'],
@@ -12,12 +12,19 @@ def status():
     return jsonify({"status": "OK"})
 
 
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def metrics():
+    """Retrieves the counters kept by the storage engine"""
+    return jsonify(storage.metrics())
+
+
 @app_views.route('/stats', methods=['GET'], strict_slashes=False)
 def count():
     """Retrieves the number of each object by type"""
-    return jsonify({"amenities": storage.count("Amenity"),
-                    "cities": storage.count("City"),
-                    "places": storage.count("Place"),
-                    "reviews": storage.count("Review"),
-                    "states": storage.count("State"),
-                    "users": storage.count("User")})
+    counts = storage.counts()
+    return jsonify({"amenities": counts["Amenity"],
+                    "cities": counts["City"],
+                    "places": counts["Place"],
+                    "reviews": counts["Review"],
+                    "states": counts["State"],
+                    "users": counts["User"]})
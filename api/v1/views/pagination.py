@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+"""Helpers returning the collections of the API, a page at a time"""
+from flask import Response, current_app, jsonify, make_response, request
+from flask import stream_with_context, url_for
+
+from models import storage
+
+# attributes the collections can be sorted by with ?sort=
+sort_keys = ["name"]
+
+
+def page_args():
+    """
+    Returns the (limit, cursor) of the query string.
+    limit is None when the whole collection is wanted and raises a
+    ValueError when it is not a positive integer.
+    """
+    limit = request.args.get('limit')
+    if limit is not None:
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+    return limit, request.args.get('cursor')
+
+
+def collection(cls, attr=None, value=None):
+    """
+    Returns the JSON response listing the objects of cls, or only those
+    whose foreign key attr equals value.
+    With ?limit=<n>&cursor=<id> only the n objects following the id
+    cursor are listed, in id order.  With ?stream=1 the whole collection
+    is streamed instead.  With ?sort=name the whole collection is listed
+    in name order.
+    """
+    try:
+        limit, cursor = page_args()
+    except ValueError:
+        return make_response(jsonify({"error": "Invalid limit"}), 400)
+    sort = request.args.get('sort')
+    if sort is not None:
+        if sort not in sort_keys or not hasattr(cls, sort) or \
+                limit is not None:
+            return make_response(jsonify({"error": "Invalid sort"}), 400)
+        objs = storage.all_sorted(cls, sort, attr, value)
+        if streamed():
+            return stream_response(obj.to_dict() for obj in objs)
+        return jsonify([obj.to_dict() for obj in objs])
+    if limit is None:
+        if streamed():
+            if attr is None:
+                objs = storage.iter(cls)
+            else:
+                objs = storage.related(cls, attr, value)
+            return stream_response(obj.to_dict() for obj in objs)
+        if attr is None:
+            objs = storage.all(cls).values()
+        else:
+            objs = storage.related(cls, attr, value)
+        return jsonify([obj.to_dict() for obj in objs])
+    objs = storage.page(cls, limit + 1, cursor, attr, value)
+    return page_response([obj.to_dict() for obj in objs], limit)
+
+
+def streamed():
+    """Returns True when the query string asks for a streamed response"""
+    return request.args.get('stream', '0').lower() not in ('0', 'false', '')
+
+
+def stream_response(dicts):
+    """
+    Returns a response streaming the JSON array of the dicts iterable.
+    The dicts are encoded one at a time as the client reads the body, and
+    sent in chunks of up to 100 of them.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        """Yields the chunks of the JSON array"""
+        chunk = ["["]
+        sep = ""
+        for d in dicts:
+            chunk.append(sep + dumps(d, separators=(",", ":")))
+            sep = ","
+            if len(chunk) >= 100:
+                yield "".join(chunk)
+                chunk = []
+        chunk.append("]\n")
+        yield "".join(chunk)
+
+    return Response(stream_with_context(generate()),
+                    mimetype=current_app.json.mimetype)
+
+
+def page_response(dicts, limit):
+    """
+    Returns the JSON response of a page, from up to limit + 1 object dicts.
+    When there is a next page, its cursor is given in the X-Next-Cursor
+    header and its URL in the Link header.
+    """
+    response = jsonify(dicts[:limit])
+    if len(dicts) > limit:
+        cursor = dicts[limit - 1]["id"]
+        args = dict(request.view_args, limit=limit, cursor=cursor)
+        response.headers['X-Next-Cursor'] = cursor
+        response.headers['Link'] = '<{}>; rel="next"'.format(
+            url_for(request.endpoint, **args))
+    return response
@@ -1,13 +1,15 @@
 #!/usr/bin/python3
 """The Places Module"""
+import heapq
+
 from flask import abort, jsonify, make_response, request
 
 from api.v1.views import app_views
+from api.v1.views.pagination import collection, page_args, page_response
+from api.v1.views.pagination import stream_response, streamed
 from models import storage
-from models.amenity import Amenity
 from models.city import City
 from models.place import Place
-from models.state import State
 from models.user import User
 
 
@@ -19,9 +21,7 @@ def get_places_by_city(city_id):
     if city is None:
         abort(404)
 
-    a_places_list = [obj.to_dict() for obj in storage.all(Place).values()
-                     if city_id == obj.city_id]
-    return jsonify(a_places_list)
+    return collection(Place, "city_id", city_id)
 
 
 @app_views.route('/places/<place_id>', methods=['GET'], strict_slashes=False)
@@ -101,55 +101,41 @@ def places_search():
     """
     Retrieves all Place objects depending on the JSON in the request body.
     """
-    if request.get_json() is None:
+    data = request.get_json()
+    if data is None:
         return make_response(jsonify({"error": "Not a JSON"}), 400)
 
-    data = request.get_json()
+    try:
+        limit, cursor = page_args()
+    except ValueError:
+        return make_response(jsonify({"error": "Invalid limit"}), 400)
 
-    if data and len(data):
-        states = data.get('states', None)
-        cities = data.get('cities', None)
-        amenities = data.get('amenities', None)
-
-    if not data or not len(data) or (
-            not states and
-            not cities and
-            not amenities):
-        places = storage.all(Place).values()
-        all_places = []
-        for place in places:
-            all_places.append(place.to_dict())
-        return jsonify(all_places)
-
-    all_places = []
-    if states:
-        states_obj = [storage.get(State, s_id) for s_id in states]
-        for state in states_obj:
-            if state:
-                for city in state.cities:
-                    if city:
-                        for place in city.places:
-                            all_places.append(place)
-
-    if cities:
-        city_obj = [storage.get(City, c_id) for c_id in cities]
-        for city in city_obj:
-            if city:
-                for place in city.places:
-                    if place not in all_places:
-                        all_places.append(place)
-
-    if amenities:
-        if not all_places:
-            all_places = storage.all(Place).values()
-        amenities_obj = [storage.get(Amenity, a_id) for a_id in amenities]
-        all_places = [place for place in all_places
-                      if all([am in place.amenities for am in amenities_obj])]
-
-    places = []
-    for plc in all_places:
+    if not data:
+        if limit is None and streamed():
+            return stream_response(place_dicts(storage.iter(Place)))
+        all_places = storage.search_places()
+    else:
+        all_places = storage.search_places(data.get('states', None),
+                                           data.get('cities', None),
+                                           data.get('amenities', None))
+    if limit is None and streamed():
+        return stream_response(place_dicts(all_places))
+    if limit is not None:
+        if cursor:
+            all_places = [plc for plc in all_places if plc.id > cursor]
+        all_places = heapq.nsmallest(limit + 1, all_places,
+                                     key=lambda plc: plc.id)
+
+    places = list(place_dicts(all_places))
+
+    if limit is not None:
+        return page_response(places, limit)
+    return jsonify(places)
+
+
+def place_dicts(places):
+    """Yields the dicts of places, without their amenities"""
+    for plc in places:
         place_dict = plc.to_dict()
         place_dict.pop('amenities', None)
-        places.append(place_dict)
-
-    return jsonify(places)
+        yield place_dict
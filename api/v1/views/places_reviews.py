@@ -6,6 +6,7 @@ The Reviews API Module
 from flask import abort, jsonify, make_response, request
 
 from api.v1.views import app_views
+from api.v1.views.pagination import collection
 from models import storage
 from models.place import Place
 from models.review import Review
@@ -20,9 +21,7 @@ def get_reviews_by_place(place_id):
     if place is None:
         abort(404)
 
-    reviews = [obj.to_dict() for obj in storage.all(Review).values()
-               if obj.place_id == place_id]
-    return jsonify(reviews)
+    return collection(Review, "place_id", place_id)
 
 
 @app_views.route('/reviews/<review_id>', methods=['GET'], strict_slashes=False)
@@ -2,20 +2,45 @@
 """
 Module to handle all default RESTFul API actions for State objects.
 """
-from flask import abort, jsonify, make_response, request
+from flask import abort, current_app, jsonify, make_response, request
 
 from api.v1.views import app_views
+from api.v1.views.pagination import collection
 from models import storage
+from models.city import City
 from models.state import State
 
+# dictionary - the JSON of the states tree and the versions it was built at
+tree_cache = {}
+
 
 @app_views.route('/states', methods=['GET'], strict_slashes=False)
 def get_states():
     """
     Retrieves the list of all State objects and returns them in JSON format.
     """
-    states_list = [obj.to_dict() for obj in storage.all(State).values()]
-    return jsonify(states_list)
+    return collection(State)
+
+
+@app_views.route('/states/tree', methods=['GET'], strict_slashes=False)
+def get_states_tree():
+    """
+    Retrieves every State with the list of its City objects in "cities",
+    both in name order.
+    The JSON is kept until a State or a City changes, unless
+    storage.version() is None.
+    """
+    version = (storage.version(State), storage.version(City))
+    if None in version or tree_cache.get("version") != version:
+        tree = []
+        for state, cities in storage.states_tree():
+            state_dict = state.to_dict()
+            state_dict["cities"] = [city.to_dict() for city in cities]
+            tree.append(state_dict)
+        tree_cache["json"] = jsonify(tree).get_data()
+        tree_cache["version"] = version
+    return current_app.response_class(tree_cache["json"],
+                                      mimetype=current_app.json.mimetype)
 
 
 @app_views.route('/states/<state_id>', methods=['GET'],
@@ -3,6 +3,7 @@
 from flask import abort, jsonify, make_response, request
 
 from api.v1.views import app_views
+from api.v1.views.pagination import collection
 from models import storage
 from models.user import User
 
@@ -10,8 +11,7 @@ from models.user import User
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def get_users():
     """Retrieves list of all User objects"""
-    a_users = [obj.to_dict() for obj in storage.all(User).values()]
-    return jsonify(a_users)
+    return collection(User)
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Benchmarks console ingestion of COUNT states into a store of SEED objects:
+one create command saved each, create commands in a begin/commit batch,
+and the load command on a JSON lines file
+
+Every mode runs in a fresh process inside its own temporary directory.
+
+usage: python3 -m benchmarks.console_ingest [count]
+"""
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+COUNT = 2000
+SEED = 10000
+MODES = ["create", "batch", "load"]
+
+
+def ingest(mode, count, queue):
+    """seeds the store, then puts the states ingested per second in queue"""
+    import models
+    from console import HBNBCommand
+    from models.state import State
+
+    for i in range(SEED):
+        models.storage.new(State(name="Seed{}".format(i)))
+    models.storage.save()
+    if mode == "load":
+        with open("states.jsonl", "w") as f:
+            for i in range(count):
+                f.write(json.dumps({"__class__": "State",
+                                    "name": "State{}".format(i)}) + "\n")
+    console = HBNBCommand()
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        if mode == "load":
+            console.onecmd("load states.jsonl")
+        else:
+            if mode == "batch":
+                console.onecmd("begin")
+            for i in range(count):
+                console.onecmd('create State name="State{}"'.format(i))
+            if mode == "batch":
+                console.onecmd("commit")
+        elapsed = time.perf_counter() - start
+    queue.put(count / elapsed)
+
+
+def bench(mode, count):
+    """returns the states per second ingested in mode"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        proc = context.Process(target=ingest, args=(mode, count, queue))
+        proc.start()
+        rate = queue.get()
+        proc.join()
+    finally:
+        os.chdir(cwd)
+    return rate
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else COUNT
+    print("{:>8} {:>14}".format("mode", "objects/s"))
+    for mode in MODES:
+        print("{:>8} {:>14.1f}".format(mode, bench(mode, count)))
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+Benchmarks request throughput of threaded workers at different connection
+pool sizes, with the pool arguments DBStorage reads from the environment
+
+SQLite stands in for MySQL: every new connection waits CONNECT_DELAY, as
+for the MySQL handshake, and every request holds its connection for
+QUERY_DELAY, as for the network round trip, then counts a table.
+Each of THREADS threads serves REQUESTS requests.
+
+usage: python3 -m benchmarks.db_pool [pool sizes ...]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool, QueuePool
+
+from models.engine.db_storage import pool_options
+
+POOL_SIZES = [1, 4, 16]
+THREADS = 16
+REQUESTS = 50
+CONNECT_DELAY = 0.01
+QUERY_DELAY = 0.002
+
+
+def engine(pool_size):
+    """returns an engine with a pool of pool_size, none when it is 0"""
+    url = "sqlite:///pool.db"
+    if pool_size:
+        os.environ["HBNB_MYSQL_POOL_SIZE"] = str(pool_size)
+        os.environ["HBNB_MYSQL_MAX_OVERFLOW"] = "0"
+        new = create_engine(url, poolclass=QueuePool, **pool_options())
+    else:
+        new = create_engine(url, poolclass=NullPool)
+
+    @event.listens_for(new, "connect")
+    def connect(dbapi_connection, connection_record):
+        """delays the new connections"""
+        time.sleep(CONNECT_DELAY)
+
+    return new
+
+
+def bench(pool_size):
+    """returns the number of requests per second served by the threads"""
+    db = engine(pool_size)
+    with db.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS places (id TEXT)"))
+
+    def worker():
+        """serves REQUESTS requests, one connection checkout each"""
+        for _ in range(REQUESTS):
+            with db.connect() as conn:
+                time.sleep(QUERY_DELAY)
+                conn.execute(text("SELECT COUNT(*) FROM places")).scalar()
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    db.dispose()
+    return THREADS * REQUESTS / elapsed
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or POOL_SIZES
+    os.chdir(tempfile.mkdtemp())
+    print("{:>10} {:>12}".format("pool size", "requests/s"))
+    print("{:>10} {:>12.1f}".format("none", bench(0)))
+    for size in sizes:
+        print("{:>10} {:>12.1f}".format(size, bench(size)))
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""
+Benchmarks rebuilding model instances from stored dictionaries with the
+constructor, as reload() used to, and with BaseModel.from_storage()
+
+usage: python3 -m benchmarks.model_hydration [size]
+"""
+import sys
+import timeit
+
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+SIZE = 100000
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE
+    records = []
+    for i in range(size // 4):
+        records.append((State, State(name="State").to_dict()))
+        records.append((User, User(email="a@b.c", first_name="A").to_dict()))
+        records.append((Review, Review(text="Great", user_id="u").to_dict()))
+        records.append((Place, Place(name="Place", city_id="c",
+                                     number_rooms=i % 7).to_dict()))
+
+    def construct():
+        """rebuilds every record with cls(**values)"""
+        for cls, values in records:
+            cls(**values)
+
+    def from_storage():
+        """rebuilds every record with cls.from_storage(values)"""
+        for cls, values in records:
+            cls.from_storage(values)
+
+    print("{:>14} {:>12} {:>12}".format("method", "total (ms)",
+                                        "per obj (us)"))
+    for name, run in [("cls(**values)", construct),
+                      ("from_storage", from_storage)]:
+        elapsed = min(timeit.repeat(run, number=1, repeat=3))
+        print("{:>14} {:>12.1f} {:>12.2f}".format(
+            name, elapsed * 1e3, elapsed / len(records) * 1e6))
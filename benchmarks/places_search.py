@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.search_places() against the list based algorithm
+POST /api/v1/places_search used before, on 100k places in 1000 cities of
+50 states, with 50 amenities
+
+usage: python3 -m benchmarks.places_search [places]
+"""
+import random
+import sys
+import timeit
+
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.state import State
+
+PLACES = 100000
+
+
+def legacy_search(states, cities, amenities):
+    """the algorithm of places_search before the storage engine"""
+    all_places = []
+    for state in [storage.get(State, s_id) for s_id in states]:
+        if state:
+            for city in state.cities:
+                for place in city.places:
+                    all_places.append(place)
+    for city in [storage.get(City, c_id) for c_id in cities]:
+        if city:
+            for place in city.places:
+                if place not in all_places:
+                    all_places.append(place)
+    if amenities:
+        if not all_places:
+            all_places = storage.all(Place).values()
+        amenities_obj = [storage.get(Amenity, a_id) for a_id in amenities]
+        all_places = [place for place in all_places
+                      if all([am in place.amenities for am in amenities_obj])]
+    return all_places
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else PLACES
+    random.seed(0)
+    FileStorage._FileStorage__objects.clear()
+    FileStorage._FileStorage__classes.clear()
+    states = [State(name="State{}".format(i)) for i in range(50)]
+    cities = [City(name="City{}".format(i), state_id=states[i % 50].id)
+              for i in range(1000)]
+    places = [Place(name="Place{}".format(i), city_id=cities[i % 1000].id)
+              for i in range(size)]
+    amenities = [Amenity(name="Amenity{}".format(i),
+                         place_id=random.choice(places).id)
+                 for i in range(50)]
+    for obj in states + cities + places + amenities:
+        storage.new(obj)
+    queries = {
+        "5 states": ([s.id for s in states[:5]], [], []),
+        "5 states + 50 cities": ([s.id for s in states[:5]],
+                                 [c.id for c in cities[:50]], []),
+        "1 amenity": ([], [], [amenities[0].id]),
+        "50 states + 1 amenity": ([s.id for s in states], [],
+                                  [amenities[0].id]),
+    }
+    print("{:>24} {:>8} {:>12} {:>12}".format("query", "places",
+                                              "legacy (ms)", "engine (ms)"))
+    for name, args in queries.items():
+        found = len(storage.search_places(*args))
+        assert found == len(legacy_search(*args))
+        legacy = min(timeit.repeat(lambda: legacy_search(*args),
+                                   number=1, repeat=3))
+        engine = min(timeit.repeat(lambda: storage.search_places(*args),
+                                   number=1, repeat=3))
+        print("{:>24} {:>8} {:>12.2f} {:>12.2f}".format(
+            name, found, legacy * 1e3, engine * 1e3))
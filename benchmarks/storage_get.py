@@ -0,0 +1,39 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.get() latency against the size of the store
+
+usage: python3 -m benchmarks.storage_get [size ...]
+"""
+import sys
+import timeit
+
+from models.engine.file_storage import FileStorage
+from models.state import State
+
+SIZES = [1000, 10000, 100000, 1000000]
+LOOKUPS = 10000
+
+
+def bench(size):
+    """returns the mean get() latency in microseconds for a store of size"""
+    storage = FileStorage()
+    FileStorage._FileStorage__objects = {}
+    ids = []
+    for i in range(size):
+        state = State(name="State{}".format(i))
+        storage.new(state)
+        ids.append(state.id)
+    probes = [ids[i * size // LOOKUPS] for i in range(LOOKUPS)]
+
+    def run():
+        """looks up every probe id once"""
+        for state_id in probes:
+            storage.get(State, state_id)
+    return min(timeit.repeat(run, number=1, repeat=5)) / LOOKUPS * 1e6
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print("{:>10} {:>12}".format("objects", "get (us)"))
+    for size in sizes:
+        print("{:>10} {:>12.3f}".format(size, bench(size)))
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Benchmarks the cold start of a process on an existing store: the time to
+import models (which reloads the storage) and count every class, and the
+resulting peak RSS, for the json and indexed snapshot formats
+
+usage: python3 -m benchmarks.storage_reload [size ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+SIZES = [10000, 100000]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED = """
+import models
+from models.place import Place
+for i in range({size}):
+    models.storage.new(Place(name="Place{{}}".format(i), city_id="c",
+                             user_id="u", number_rooms=i % 7))
+models.storage.save()
+"""
+
+START = """
+import resource
+import time
+start = time.perf_counter()
+import models
+from models.place import Place
+models.storage.count(Place)
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed * 1e3, rss / 1024)
+"""
+
+
+def run(code, directory, file_format):
+    """runs code in a fresh interpreter, returns its output"""
+    env = dict(os.environ, PYTHONPATH=ROOT, HBNB_FILE_FORMAT=file_format)
+    return subprocess.check_output([sys.executable, "-c", code],
+                                   cwd=directory, env=env).decode()
+
+
+def bench(size):
+    """returns the start time (ms) and RSS (MiB) of each format"""
+    results = []
+    for file_format in ["json", "indexed"]:
+        directory = tempfile.mkdtemp()
+        run(SEED.format(size=size), directory, file_format)
+        results.extend(float(x) for x in
+                       run(START, directory, file_format).split())
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print("{:>10} {:>10} {:>10} {:>13} {:>13}".format(
+        "objects", "json (ms)", "json (MiB)", "indexed (ms)",
+        "indexed (MiB)"))
+    for size in sizes:
+        print("{:>10} {:>10.1f} {:>10.1f} {:>13.1f} {:>13.1f}".format(
+            size, *bench(size)))
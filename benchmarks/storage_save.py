@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.save() latency after a single update, against the
+size of the store
+
+"full" re-encodes every object like save() used to, "dirty" only
+re-encodes the changed object and "journal" appends it to the journal.
+
+usage: python3 -m benchmarks.storage_save [size ...]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+SIZES = [1000, 10000, 100000]
+
+
+def bench(size):
+    """returns the mean save() latency in milliseconds for each mode"""
+    storage = FileStorage()
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__classes = {}
+    for i in range(size):
+        storage.new(Place(name="Place{}".format(i), city_id="c", user_id="u",
+                          number_rooms=i % 7, latitude=1.5))
+    storage.save()
+    place = next(iter(storage.all(Place).values()))
+    fragments = FileStorage._FileStorage__fragments
+
+    def full():
+        """saves after one update, with every object dirty"""
+        place.number_rooms += 1
+        fragments.clear()
+        storage.save()
+
+    def dirty():
+        """saves after one update"""
+        place.number_rooms += 1
+        storage.save()
+
+    results = []
+    for journal, run in [(False, full), (False, dirty), (True, dirty)]:
+        FileStorage._FileStorage__journal = journal
+        storage.save()
+        results.append(min(timeit.repeat(run, number=5, repeat=3)) / 5 * 1e3)
+    FileStorage._FileStorage__journal = False
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    os.chdir(tempfile.mkdtemp())
+    print("{:>10} {:>12} {:>12} {:>12}".format("objects", "full (ms)",
+                                               "dirty (ms)", "journal (ms)"))
+    for size in sizes:
+        print("{:>10} {:>12.3f} {:>12.3f} {:>12.3f}".format(size,
+                                                            *bench(size)))
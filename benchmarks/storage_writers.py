@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.save() throughput with concurrent writer processes
+sharing one store through the advisory file lock
+
+Every writer creates a Place and saves it, SAVES times.
+
+usage: python3 -m benchmarks.storage_writers [writers ...]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+WRITERS = [1, 4, 16]
+SAVES = 200
+SEED = 1000
+
+
+def writer(journal):
+    """creates and saves SAVES places"""
+    FileStorage._FileStorage__journal = journal
+    for i in range(SAVES):
+        models.storage.new(Place(name="Place{}".format(i)))
+        models.storage.save()
+
+
+def bench(writers, journal):
+    """returns the number of saves per second done by all the writers"""
+    for name in ["file.json", "file.json.journal"]:
+        if os.path.exists(name):
+            os.remove(name)
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__classes = {}
+    for i in range(SEED):
+        models.storage.new(Place(name="Seed{}".format(i)))
+    models.storage.save()
+    procs = [multiprocessing.Process(target=writer, args=(journal,))
+             for _ in range(writers)]
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    return writers * SAVES / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or WRITERS
+    os.chdir(tempfile.mkdtemp())
+    print("{:>8} {:>16} {:>16}".format("writers", "snapshot (op/s)",
+                                       "journal (op/s)"))
+    for count in counts:
+        print("{:>8} {:>16.1f} {:>16.1f}".format(count, bench(count, False),
+                                                 bench(count, True)))
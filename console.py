@@ -2,7 +2,10 @@
 """ console """
 
 import cmd
+import itertools
+import json
 import shlex  # for splitting the line along spaces except in double quotes
+import time
 from datetime import datetime
 
 import models
@@ -21,9 +24,21 @@ classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
 class HBNBCommand(cmd.Cmd):
     """ HBNH console """
     prompt = '(hbnb) '
+    # boolean - saves are deferred to the commit command
+    batch = False
+    # int - changes made since the begin command
+    changes = 0
+    # float - time of the begin command
+    began = 0
+    # int - number of objects loaded between two progress reports
+    progress_every = 10000
+    # int - number of objects printed at once by all
+    chunk_size = 100
 
     def do_EOF(self, arg):
         """Exits console"""
+        if self.batch:
+            self.do_commit("")
         return True
 
     def emptyline(self):
@@ -32,8 +47,73 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit(self, arg):
         """Quit command to exit the program"""
+        if self.batch:
+            self.do_commit("")
         return True
 
+    def do_begin(self, arg):
+        """Starts a batch: changes are only saved by the commit command"""
+        if self.batch:
+            print("** batch already started **")
+            return False
+        self.batch = True
+        self.changes = 0
+        self.began = time.perf_counter()
+
+    def do_commit(self, arg):
+        """Saves the changes of the batch at once and ends it"""
+        if not self.batch:
+            print("** no batch started **")
+            return False
+        self.batch = False
+        models.storage.save()
+        self._report("Saved", self.changes, self.began)
+
+    def do_load(self, arg):
+        """Creates the instances of a JSON lines file and saves them at once"""
+        args = shlex.split(arg)
+        if len(args) == 0:
+            print("** file name missing **")
+            return False
+        try:
+            f = open(args[0], "r")
+        except OSError:
+            print("** file doesn't exist **")
+            return False
+        start = time.perf_counter()
+        count = 0
+        with f:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    values = json.loads(line)
+                    cls = classes[values["__class__"]]
+                    if type(values.get("id", "")) is not str:
+                        raise TypeError("id is not a string")
+                    models.storage.new(cls(**values))
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    print("** invalid line {} **".format(n))
+                    continue
+                count += 1
+                if count % self.progress_every == 0:
+                    self._report("Loaded", count, start)
+        self._save(count)
+        self._report("Loaded", count, start)
+
+    def _save(self, changes=1):
+        """saves the storage, or counts the changes until the commit"""
+        if self.batch:
+            self.changes += changes
+        else:
+            models.storage.save()
+
+    def _report(self, done, count, start):
+        """prints the number of objects processed since start and the rate"""
+        elapsed = time.perf_counter() - start
+        print("{} {} objects in {:.2f}s ({:.0f} objects/s)".format(
+            done, count, elapsed, count / elapsed if elapsed else 0))
+
     def _key_value_parser(self, args):
         """creates a dictionary from a list of strings"""
         new_dict = {}
@@ -68,7 +148,9 @@ class HBNBCommand(cmd.Cmd):
             print("** class doesn't exist **")
             return False
         print(instance.id)
-        instance.save()
+        instance.updated_at = datetime.utcnow()
+        models.storage.new(instance)
+        self._save()
 
     def do_show(self, arg):
         """Prints an instance as a string based on the class and id"""
@@ -97,8 +179,8 @@ class HBNBCommand(cmd.Cmd):
             if len(args) > 1:
                 key = args[0] + "." + args[1]
                 if key in models.storage.all():
-                    models.storage.all().pop(key)
-                    models.storage.save()
+                    models.storage.delete(models.storage.all()[key])
+                    self._save()
                 else:
                     print("** no instance found **")
             else:
@@ -107,21 +189,60 @@ class HBNBCommand(cmd.Cmd):
             print("** class doesn't exist **")
 
     def do_all(self, arg):
-        """Prints string representations of instances"""
-        args = shlex.split(arg)
-        obj_list = []
-        if len(args) == 0:
-            obj_dict = models.storage.all()
-        elif args[0] in classes:
-            obj_dict = models.storage.all(classes[args[0]])
-        else:
+        """Prints string representations of instances
+        usage: all [<class>] [--class=<class>] [--limit=<n>]
+        The instances are printed as they are read from the storage."""
+        args, options = self._options(shlex.split(arg))
+        cls_name = options.get("class", args[0] if args else None)
+        if cls_name is not None and cls_name not in classes:
             print("** class doesn't exist **")
             return False
-        for key in obj_dict:
-            obj_list.append(str(obj_dict[key]))
-        print("[", end="")
-        print(", ".join(obj_list), end="")
-        print("]")
+        objs = models.storage.iter(classes.get(cls_name))
+        if "limit" in options:
+            try:
+                limit = int(options["limit"])
+                if limit < 0:
+                    raise ValueError
+            except ValueError:
+                print("** invalid limit **")
+                return False
+            objs = itertools.islice(objs, limit)
+        chunk = ["["]
+        sep = ""
+        for obj in objs:
+            chunk.append(sep + str(obj))
+            sep = ", "
+            if len(chunk) >= self.chunk_size:
+                print("".join(chunk), end="", flush=True)
+                chunk = []
+        chunk.append("]")
+        print("".join(chunk))
+
+    def do_count(self, arg):
+        """Prints the number of instances, or of the instances of a class
+        usage: count [<class>] [--class=<class>]"""
+        args, options = self._options(shlex.split(arg))
+        cls_name = options.get("class", args[0] if args else None)
+        if cls_name is None:
+            print(models.storage.count())
+        elif cls_name in classes:
+            print(models.storage.count(classes[cls_name]))
+        else:
+            print("** class doesn't exist **")
+
+    def _options(self, args):
+        """splits the --name=value or --name value options from the args,
+        returns the other args and a dictionary of the options"""
+        others = []
+        options = {}
+        args = iter(args)
+        for arg in args:
+            if arg.startswith("--"):
+                name, sep, value = arg[2:].partition("=")
+                options[name] = value if sep else next(args, "")
+            else:
+                others.append(arg)
+        return others, options
 
     def do_update(self, arg):
         """Update an instance based on the class name, id, attribute & value"""
@@ -148,8 +269,11 @@ class HBNBCommand(cmd.Cmd):
                                         args[3] = float(args[3])
                                     except:
                                         args[3] = 0.0
-                            setattr(models.storage.all()[k], args[2], args[3])
-                            models.storage.all()[k].save()
+                            obj = models.storage.all()[k]
+                            setattr(obj, args[2], args[3])
+                            obj.updated_at = datetime.utcnow()
+                            models.storage.new(obj)
+                            self._save()
                         else:
                             print("** value missing **")
                     else:
@@ -12,18 +12,53 @@ from models.review import Review
 from models.state import State
 from models.user import User
 from os import getenv
+from time import monotonic
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import create_engine, event, exists, func, or_, select
+from sqlalchemy.orm import aliased, scoped_session, sessionmaker
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
 
+# create_engine() pool arguments and the variables setting them
+pool_variables = {"pool_size": ('HBNB_MYSQL_POOL_SIZE', int),
+                  "max_overflow": ('HBNB_MYSQL_MAX_OVERFLOW', int),
+                  "pool_recycle": ('HBNB_MYSQL_POOL_RECYCLE', int),
+                  "pool_timeout": ('HBNB_MYSQL_POOL_TIMEOUT', float)}
+
+
+def pool_options():
+    """
+    Returns the connection pool arguments of create_engine() set in the
+    environment, SQLAlchemy uses its defaults for the others.
+    Connections are pinged before use unless HBNB_MYSQL_POOL_PRE_PING=0.
+    """
+    options = {"pool_pre_ping":
+               getenv('HBNB_MYSQL_POOL_PRE_PING', '1') not in ('', '0')}
+    for option, (var, cast) in pool_variables.items():
+        value = getenv(var)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
 class DBStorage:
     """interacts with the MySQL database"""
     __engine = None
     __session = None
+    # dictionary - (count, time counted) by class name, dropped on changes
+    __counts = None
+    # float - seconds the cached counts and version() are trusted, other
+    # writers of the database being unseen meanwhile; 0 caches nothing
+    __cache_ttl = 0
+    # dictionary - hits and misses of the cached counts
+    __count_stats = None
+    # dictionary - changes made to the objects by class name, returned by
+    # version()
+    __changes = None
+    # float - time every class was last counted as changed
+    __expired = 0
 
     def __init__(self):
         """Instantiate a DBStorage object"""
@@ -32,11 +67,17 @@ class DBStorage:
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
+        self.__counts = {}
+        self.__cache_ttl = float(getenv('HBNB_CACHE_TTL', 0))
+        self.__count_stats = {"hits": 0, "misses": 0}
+        self.__changes = {}
+        self.__expired = monotonic()
         self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
                                       format(HBNB_MYSQL_USER,
                                              HBNB_MYSQL_PWD,
                                              HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+                                             HBNB_MYSQL_DB),
+                                      **pool_options())
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
@@ -51,23 +92,46 @@ class DBStorage:
                     new_dict[key] = obj
         return (new_dict)
 
+    def iter(self, cls=None):
+        """yields the objects of cls, or all objects, one at a time
+
+        The rows are fetched in batches instead of in one list.
+        """
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls is clss:
+                query = self.__session.query(classes[clss])
+                for obj in query.yield_per(1000):
+                    yield obj
+
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
+        self.__counts.pop(obj.__class__.__name__, None)
+        self._changed(obj.__class__.__name__)
 
     def save(self):
         """commit all changes of the current database session"""
         self.__session.commit()
 
+    def rollback(self):
+        """discards the changes of the current database session not saved"""
+        self.__session.rollback()
+        self.__counts.clear()
+        self._changed()
+
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
             self.__session.delete(obj)
+            # deletes cascade to the objects of other classes
+            self.__counts.clear()
+            self._changed()
 
     def reload(self):
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        event.listen(sess_factory, "after_flush", self._flushed)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
@@ -76,17 +140,190 @@ class DBStorage:
         self.__session.remove()
 
     def get(self, cls, id):
-        """retrieves an object"""
+        """retrieves an object by primary key (identity map first)"""
         if cls in classes.values() and id and type(id) == str:
-            db_obj = self.all(cls)
-            for key, val in db_obj.items():
-                if key.split(".")[1] == id:
-                    return val
+            return self.__session.get(cls, id)
         return None
 
+    def related(self, cls, attr, value):
+        """returns the objects of cls whose foreign key attr equals value"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls is None:
+            return []
+        return self.__session.query(cls).filter(
+            getattr(cls, attr) == value).all()
+
+    def page(self, cls, limit, after=None, attr=None, value=None):
+        """returns up to limit objects of cls with an id above after
+
+        The objects come in id order, optionally only those whose foreign
+        key attr equals value.  Only the rows of the page are fetched.
+        """
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls is None:
+            return []
+        query = self.__session.query(cls)
+        if attr is not None:
+            query = query.filter(getattr(cls, attr) == value)
+        if after:
+            query = query.filter(cls.id > after)
+        return query.order_by(cls.id).limit(limit).all()
+
+    def all_sorted(self, cls, key="name", attr=None, value=None):
+        """returns the objects of cls ordered by their attribute key
+
+        The rows come sorted from the database, optionally only those
+        whose foreign key attr equals value.
+        """
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls is None:
+            return []
+        query = self.__session.query(cls)
+        if attr is not None:
+            query = query.filter(getattr(cls, attr) == value)
+        return query.order_by(getattr(cls, key), cls.id).all()
+
+    def states_tree(self):
+        """returns every state with its cities, as (state, [city, ...])
+
+        One query joins the states to their cities, in name order.
+        """
+        query = self.__session.query(State, City).outerjoin(
+            City, City.state_id == State.id).order_by(
+            State.name, State.id, City.name, City.id)
+        tree = []
+        for state, city in query:
+            if not tree or tree[-1][0] is not state:
+                tree.append((state, []))
+            if city is not None:
+                tree[-1][1].append(city)
+        return tree
+
+    def search_places(self, states=None, cities=None, amenities=None):
+        """returns the places of POST /api/v1/places_search
+
+        One query selects the places of the cities of states and of
+        cities which have every amenity, the ids of those places being
+        grouped from place_amenity with HAVING COUNT.  With amenities, the
+        places must only be in those cities when the cities have places.
+        Without any filter every place is returned.
+        """
+        query = self.__session.query(Place)
+        if states or cities:
+            in_cities = self._in_cities(Place, states, cities)
+            if amenities:
+                other = aliased(Place)
+                in_cities = or_(in_cities, ~exists().where(
+                    self._in_cities(other, states, cities)))
+            query = query.filter(in_cities)
+        if amenities:
+            amenity_ids = set(amenities)
+            links = Base.metadata.tables['place_amenity']
+            with_all = select(links.c.place_id).where(
+                links.c.amenity_id.in_(amenity_ids)).group_by(
+                links.c.place_id).having(
+                func.count(links.c.amenity_id) == len(amenity_ids))
+            query = query.filter(Place.id.in_(with_all))
+        return query.all()
+
+    def _in_cities(self, place, states, cities):
+        """returns the SQL condition of place being in cities or in states"""
+        conditions = []
+        if cities:
+            conditions.append(place.city_id.in_(cities))
+        if states:
+            conditions.append(place.city_id.in_(
+                select(City.id).where(City.state_id.in_(states))))
+        return or_(*conditions)
+
     def count(self, cls=None):
-        """counts the number of objects in storage"""
-        obj_data = self.all(cls)
-        if cls in classes.values():
-            obj_data = self.all(cls)
-        return len(obj_data)
+        """counts the number of objects in storage, or of class cls"""
+        if cls is None:
+            return sum(self.counts().values())
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return 0
+        count = self._cached_count(cls.__name__)
+        if count is None:
+            count = self.__session.query(func.count(cls.id)).scalar()
+            self.__counts[cls.__name__] = (count, monotonic())
+        return count
+
+    def counts(self):
+        """returns the number of objects of each class, by class name
+
+        Every table is counted by a subquery of one SELECT, so the counts
+        take a single round trip to the database, and none at all while
+        the cached counts are valid.
+        """
+        counts = {clss: self._cached_count(clss) for clss in classes}
+        if None in counts.values():
+            query = select(*[select(func.count(classes[clss].id))
+                             .scalar_subquery().label(clss)
+                             for clss in classes])
+            now = monotonic()
+            counts = dict(zip(classes, self.__session.execute(query).one()))
+            for clss, count in counts.items():
+                self.__counts[clss] = (count, now)
+        return counts
+
+    def _cached_count(self, cls_name):
+        """returns the cached count of a class, None when missing or stale
+
+        Counts are only cached with HBNB_CACHE_TTL, since the changes made
+        by other writers of the database are not seen.  They expire after
+        that many seconds, and are dropped at once when this process adds
+        or deletes objects.
+        """
+        cached = self.__counts.get(cls_name)
+        if cached is not None and self.__cache_ttl and \
+                monotonic() - cached[1] < self.__cache_ttl:
+            self.__count_stats["hits"] += 1
+            return cached[0]
+        self.__count_stats["misses"] += 1
+        return None
+
+    def version(self, cls=None):
+        """returns a number that changes whenever the objects of cls change
+
+        Without cls, the number changes with any object.  The changes
+        flushed by this process are seen at once, but those of the other
+        writers of the database are not: every number also changes after
+        HBNB_CACHE_TTL seconds, and without it None is returned, as
+        nothing read from the database may be cached.
+        """
+        if not self.__cache_ttl:
+            return None
+        if monotonic() - self.__expired >= self.__cache_ttl:
+            self._changed()
+        if cls is None:
+            return sum(self.__changes.values())
+        if type(cls) is not str:
+            cls = cls.__name__
+        return self.__changes.get(cls, 0)
+
+    def _changed(self, cls_name=None):
+        """counts a change of the objects of a class, or of every class"""
+        if cls_name is None:
+            self.__expired = monotonic()
+        for name in [cls_name] if cls_name else classes:
+            self.__changes[name] = self.__changes.get(name, 0) + 1
+
+    def _flushed(self, session, flush_context):
+        """after_flush listener counting the changes of the flushed objects"""
+        changed = set(session.new) | set(session.dirty) | set(session.deleted)
+        for cls_name in {obj.__class__.__name__ for obj in changed}:
+            self._changed(cls_name)
+
+    def metrics(self):
+        """returns the counters kept by the storage engine"""
+        pool = self.__engine.pool
+        stats = {}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return {"counts": dict(self.__count_stats), "pool": stats}
@@ -3,7 +3,15 @@
 Contains the FileStorage class
 """
 
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+import fcntl
 import json
+import mmap
+import os
+from os import getenv
+import struct
+import tempfile
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -15,72 +23,768 @@ from models.user import User
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# attributes holding the id of a related object, indexed by FileStorage
+foreign_keys = ("city_id", "place_id", "state_id", "user_id")
+
+# first line of a snapshot written in the indexed format
+INDEXED_MAGIC = b"HBNBIDX1\n"
+# width of the footer holding the offset of the index of such a snapshot
+INDEXED_FOOTER = 21
+
 
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
     # string - path to the JSON file
     __file_path = "file.json"
-    # dictionary - empty but will store all objects by <class name>.id
+    # string - path to the journal of changes made since the last snapshot
+    __journal_path = __file_path + ".journal"
+    # string - path to the advisory lock shared by every writer process
+    __lock_path = __file_path + ".lock"
+    # string - path to the (generation, version) counters of the files
+    __version_path = __file_path + ".version"
+    # boolean - processes share the files and pull each other's changes
+    __shared = getenv("HBNB_FILE_SHARED", "0") not in ("", "0")
+    # boolean - save() appends to the journal instead of rewriting the file
+    __journal = __shared or getenv("HBNB_FILE_JOURNAL", "0") not in ("", "0")
+    # string - "json", or "indexed" for lazily decoded snapshots
+    __format = getenv("HBNB_FILE_FORMAT", "json")
+    # int - size in bytes past which save() compacts the journal
+    __journal_max = int(getenv("HBNB_FILE_JOURNAL_MAX", 1 << 20))
+    # dictionary - empty but will store all objects by <class name>.id,
+    # the partitions and indexes below mirror it, so it is only changed
+    # through _insert() and _remove()
     __objects = {}
+    # dictionary - the same objects partitioned by <class name>
+    __classes = {}
+    # dictionary - objects by foreign key,
+    # (<class name>, attribute): {value: {<class name>.id: obj}}
+    __related = {}
+    # dictionary - foreign keys indexed for each object,
+    # <class name>.id: ((attribute, value), ...)
+    __indexed = {}
+    # dictionary - sorted ids of a class, built by page() then maintained,
+    # <class name>: [id, ...]
+    __sorted = {}
+    # dictionary - objects of a class ordered by an attribute, built by
+    # all_sorted() then maintained,
+    # (<class name>, attribute): ([(value, id), ...], {id: value})
+    __ordered = {}
+    # dictionary - records of the indexed snapshot not decoded yet,
+    # <class name>: {<class name>.id: (offset, length)}
+    __unloaded = {}
+    # mmap - the indexed snapshot the __unloaded records point into
+    __snapshot = None
+    # dictionary - changes not saved yet, <class name>.id: obj (None = gone)
+    __pending = {}
+    # dictionary - JSON of the clean objects, <class name>.id: (obj, json)
+    __fragments = {}
+    # tuple - (inode, mtime, size) of the JSON file and the journal at the
+    # last load or save
+    __file_stat = None
+    # mmap - the version file, mapped once per process
+    __header = None
+    # tuple - (generation, version) of the files as loaded in __objects
+    __seen = (0, 0)
+    # int - bytes of the journal already replayed in __objects
+    __journal_offset = 0
+    # dictionary - reloads performed or skipped by close()
+    __reloads = {"performed": 0, "skipped": 0}
+    # dictionary - object counts by <class name>, dropped on changes
+    __counts = {}
+    # dictionary - hits and misses of the cached counts
+    __count_stats = {"hits": 0, "misses": 0}
+    # dictionary - changes made to the objects by <class name>, returned
+    # by version()
+    __changes = {}
 
     def all(self, cls=None):
-        """returns the dictionary __objects"""
+        """returns the dictionary __objects, or only the objects of cls"""
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            if type(cls) is not str:
+                cls = cls.__name__
+            self._hydrate(cls)
+            return dict(self.__classes.get(cls, {}))
+        for cls_name in list(self.__unloaded):
+            self._hydrate(cls_name)
         return self.__objects
 
+    def iter(self, cls=None):
+        """yields the objects of cls, or all objects, one at a time
+
+        Records still unloaded from an indexed snapshot are decoded only
+        when their turn comes, so no list of the objects is built.
+        """
+        if cls is None:
+            names = list(classes)
+        else:
+            names = [cls if type(cls) is str else cls.__name__]
+        for cls_name in names:
+            for obj in list(self.__classes.get(cls_name, {}).values()):
+                yield obj
+            for key in list(self.__unloaded.get(cls_name, {})):
+                self._hydrate(cls_name, key)
+                obj = self.__classes.get(cls_name, {}).get(key)
+                if obj is not None:
+                    yield obj
+
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
-            key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            key = self._insert(obj)
+            self.__pending[key] = obj
+            self.__fragments.pop(key, None)
+            self._changed(obj.__class__.__name__)
+
+    def _insert(self, obj):
+        """indexes obj in __objects and its class partition, returns its key"""
+        cls_name = obj.__class__.__name__
+        key = cls_name + "." + obj.id
+        self.__objects[key] = obj
+        self.__classes.setdefault(cls_name, {})[key] = obj
+        self.__counts.pop(cls_name, None)
+        if self.__unloaded:
+            self.__unloaded.get(cls_name, {}).pop(key, None)
+        self._index(key, obj)
+        ids = self.__sorted.get(cls_name)
+        if ids is not None:
+            i = bisect_left(ids, obj.id)
+            if i == len(ids) or ids[i] != obj.id:
+                ids.insert(i, obj.id)
+        if self.__ordered:
+            self._order(cls_name, obj.id, obj)
+        return key
+
+    def _remove(self, key):
+        """drops the object stored under key from __objects and partitions"""
+        obj = self.__objects.pop(key, None)
+        self.__fragments.pop(key, None)
+        cls_name = key.split(".", 1)[0]
+        self.__classes.get(cls_name, {}).pop(key, None)
+        self.__counts.pop(cls_name, None)
+        if self.__unloaded:
+            self.__unloaded.get(cls_name, {}).pop(key, None)
+        self._unindex(key)
+        ids = self.__sorted.get(cls_name)
+        if ids is not None:
+            obj_id = key.split(".", 1)[1]
+            i = bisect_left(ids, obj_id)
+            if i < len(ids) and ids[i] == obj_id:
+                del ids[i]
+        if self.__ordered:
+            self._order(cls_name, key.split(".", 1)[1])
+
+    def _index(self, key, obj):
+        """indexes obj under the current values of its foreign keys"""
+        self._unindex(key)
+        cls_name = obj.__class__.__name__
+        indexed = []
+        for attr in foreign_keys:
+            value = getattr(obj, attr, None)
+            if value and type(value) is str:
+                related = self.__related.setdefault((cls_name, attr), {})
+                related.setdefault(value, {})[key] = obj
+                indexed.append((attr, value))
+        if indexed:
+            self.__indexed[key] = tuple(indexed)
+
+    def _unindex(self, key):
+        """removes the object stored under key from the foreign key index"""
+        indexed = self.__indexed.pop(key, None)
+        if indexed is None:
+            return
+        cls_name = key.split(".", 1)[0]
+        for attr, value in indexed:
+            related = self.__related[(cls_name, attr)]
+            related[value].pop(key, None)
+            if not related[value]:
+                del related[value]
+
+    def related(self, cls, attr, value):
+        """returns the objects of cls whose foreign key attr equals value"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        self._hydrate(cls)
+        related = self.__related.get((cls, attr), {}).get(value, {})
+        return list(related.values())
+
+    def _hydrate(self, cls_name, key=None):
+        """decodes the unloaded records of a class, or only the one of key"""
+        unloaded = self.__unloaded.get(cls_name)
+        if not unloaded:
+            return
+        if key is not None:
+            if key not in unloaded:
+                return
+            keys = [key]
+        else:
+            keys = list(unloaded)
+        for key in keys:
+            offset, length = unloaded.pop(key)
+            fragment = self.__snapshot[offset:offset + length].decode()
+            value = json.loads(fragment)
+            obj = classes[value["__class__"]].from_storage(value)
+            self._insert(obj)
+            self.__fragments[key] = (obj, fragment)
+        if not unloaded:
+            del self.__unloaded[cls_name]
+
+    def touch(self, obj, name=None):
+        """records that the attribute name of a stored obj has changed"""
+        obj_id = obj.__dict__.get("id")
+        if obj_id is not None:
+            key = obj.__class__.__name__ + "." + obj_id
+            if self.__objects.get(key) is obj:
+                self.__pending[key] = obj
+                self.__fragments.pop(key, None)
+                self._changed(obj.__class__.__name__)
+                if name in foreign_keys:
+                    self._index(key, obj)
+                if (obj.__class__.__name__, name) in self.__ordered:
+                    self._order(obj.__class__.__name__, obj_id, obj)
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        """serializes the changes made to __objects since the last save
+
+        In journal mode the pending changes are appended to the journal,
+        which is only compacted into the JSON file (path: __file_path) once
+        it grows past __journal_max bytes.  Otherwise the whole JSON file is
+        atomically replaced.  Both happen under an exclusive lock so that
+        several processes can share the files.  If another process wrote
+        them since the last load, its changes are read back first and the
+        pending changes of this process are applied on top, so they are
+        not lost.
+        """
+        with self._lock(fcntl.LOCK_EX):
+            if self.__shared:
+                self._pull()
+            elif self._file_stat() != FileStorage.__file_stat:
+                self._merge()
+            if self.__journal:
+                size = self._append_journal()
+            if self.__journal and size <= self.__journal_max:
+                FileStorage.__journal_offset = size
+                compacted = False
+            else:
+                self._write_snapshot()
+                FileStorage.__journal_offset = 0
+                compacted = True
+            if self.__shared:
+                self._bump(compacted)
+            FileStorage.__file_stat = self._file_stat()
+
+    @contextmanager
+    def _lock(self, operation):
+        """holds the advisory file lock (LOCK_SH or LOCK_EX) in a with
+
+        Only writers create the lock file.  A reader finding none has no
+        writer to wait for, so it reads without a lock and a read-only
+        directory can still be loaded.
+        """
+        if operation == fcntl.LOCK_SH:
+            try:
+                f = open(self.__lock_path, 'r')
+            except FileNotFoundError:
+                yield
+                return
+        else:
+            f = open(self.__lock_path, 'a')
+        with f:
+            fcntl.flock(f.fileno(), operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _fragment(self, key, obj):
+        """returns the JSON of obj, encoding it only if it is dirty"""
+        cached = self.__fragments.get(key)
+        if cached is not None and cached[0] is obj:
+            return cached[1]
+        fragment = json.dumps(obj.to_dict())
+        self.__fragments[key] = (obj, fragment)
+        return fragment
+
+    def _append_journal(self):
+        """appends the pending changes to the journal, returns its size"""
+        lines = []
+        for key, obj in self.__pending.items():
+            if obj is None:
+                value = "null"
+            else:
+                value = self._fragment(key, obj)
+            lines.append('{"key": ' + json.dumps(key) +
+                         ', "value": ' + value + '}\n')
+        self.__pending.clear()
+        with open(self.__journal_path, 'a') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def _write_snapshot(self):
+        """rewrites the JSON file from __objects and empties the journal"""
+        if self.__format == "indexed":
+            chunks, index = self._indexed_snapshot()
+        else:
+            self.all()
+            items = [json.dumps(key) + ": " + self._fragment(key, obj)
+                     for key, obj in self.__objects.items()]
+            chunks = ["{" + ", ".join(items) + "}"]
+        directory = os.path.dirname(os.path.abspath(self.__file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".file.json.")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk if type(chunk) is bytes else chunk.encode())
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.__file_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        if self.__format == "indexed":
+            self._map_snapshot(index)
+        self.__pending.clear()
+        if os.path.exists(self.__journal_path):
+            os.remove(self.__journal_path)
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _indexed_snapshot(self):
+        """returns the chunks and the index of an indexed snapshot
+
+        Every object is one JSON line addressed by the index, a JSON object
+        of <class name>.id: [offset, length] written after the records and
+        followed by a fixed width footer holding its own offset.  Records
+        still unloaded are copied from the current snapshot undecoded.
+        """
+        chunks = [INDEXED_MAGIC]
+        index = {}
+        offset = len(INDEXED_MAGIC)
+        for key, obj in self.__objects.items():
+            chunks.append(self._fragment(key, obj).encode() + b"\n")
+            index[key] = (offset, len(chunks[-1]) - 1)
+            offset += len(chunks[-1])
+        for unloaded in self.__unloaded.values():
+            for key, (start, length) in unloaded.items():
+                chunks.append(self.__snapshot[start:start + length + 1])
+                index[key] = (offset, length)
+                offset += length + 1
+        chunks.append(json.dumps(index).encode() + b"\n")
+        chunks.append(b"%020d\n" % offset)
+        return chunks, index
+
+    def _map_snapshot(self, index=None):
+        """maps the indexed snapshot and points __unloaded records into it
+
+        Without an index, the one of the file is read and every record it
+        holds becomes unloaded, replacing the objects decoded before.
+        """
+        with open(self.__file_path, 'rb') as f:
+            snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if index is None:
+            start = int(snapshot[-INDEXED_FOOTER:])
+            index = json.loads(snapshot[start:-INDEXED_FOOTER])
+            for cls_name, unloaded in list(self.__unloaded.items()):
+                for key in [key for key in unloaded if key not in index]:
+                    self._hydrate(cls_name, key)
+            for key in index:
+                self._remove(key)
+                self.__pending.pop(key, None)
+                cls_name = key.split(".", 1)[0]
+                self.__unloaded.setdefault(cls_name, {})[key] = index[key]
+        else:
+            for unloaded in self.__unloaded.values():
+                for key in unloaded:
+                    unloaded[key] = index[key]
+        FileStorage.__snapshot = snapshot
 
     def reload(self):
-        """deserializes the JSON file to __objects"""
+        """deserializes the JSON file and replays the journal to __objects
+
+        A missing file is an empty store, but a corrupted one raises rather
+        than silently starting empty.  Only a torn last journal line, left
+        by a crash in the middle of an append, is ignored.
+        """
+        with self._lock(fcntl.LOCK_SH):
+            self._load()
+
+    def _load(self):
+        """reads the files into __objects, the caller holds the lock"""
+        self.__sorted.clear()
+        self.__ordered.clear()
+        self.__counts.clear()
+        self._changed()
+        if self.__shared:
+            FileStorage.__seen = self._read_header()
+        FileStorage.__file_stat = self._file_stat()
+        try:
+            with open(self.__file_path, 'rb') as f:
+                indexed = f.read(len(INDEXED_MAGIC)) == INDEXED_MAGIC
+                if not indexed:
+                    f.seek(0)
+                    jo = json.load(f)
+        except FileNotFoundError:
+            indexed = False
+            jo = {}
+        if indexed:
+            jo = {}
+            self._map_snapshot()
+        for key in jo:
+            self._insert(classes[jo[key]["__class__"]].from_storage(jo[key]))
+            self.__pending.pop(key, None)
+        FileStorage.__journal_offset = 0
+        self._replay_journal(True)
+
+    def rollback(self):
+        """discards the changes not saved yet by reloading the files"""
+        with self._lock(fcntl.LOCK_SH):
+            self.__pending.clear()
+            self._clear()
+            self._load()
+
+    def _clear(self):
+        """empties __objects along with its partitions and indexes"""
+        self.__objects.clear()
+        self.__classes.clear()
+        self.__fragments.clear()
+        self.__unloaded.clear()
+        self.__related.clear()
+        self.__indexed.clear()
+
+    def _replay_journal(self, overwrite):
+        """replays the journal past __journal_offset to __objects
+
+        With overwrite the journal wins over the pending changes of this
+        process, otherwise the pending changes are kept since they will be
+        written after the journal records.
+        """
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except:
-            pass
+            with open(self.__journal_path, 'rb') as f:
+                f.seek(self.__journal_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            key = record["key"]
+            self._changed(key.split(".", 1)[0])
+            if overwrite:
+                self.__pending.pop(key, None)
+            elif key in self.__pending:
+                continue
+            value = record["value"]
+            if value is None:
+                self._remove(key)
+            else:
+                self._insert(classes[value["__class__"]].from_storage(value))
+        FileStorage.__journal_offset += end
+
+    def _pull(self):
+        """applies the changes other processes saved since the last pull
+
+        Only the journal records not seen yet are replayed, unless the JSON
+        file was compacted meanwhile, in which case everything is reloaded
+        and the pending changes of this process are applied back on top.
+        The caller holds the lock.
+        """
+        header = self._read_header()
+        if header == self.__seen:
+            return
+        if header[0] == self.__seen[0]:
+            self._replay_journal(False)
+            FileStorage.__seen = header
+        else:
+            self._merge()
+        FileStorage.__file_stat = self._file_stat()
+
+    def _merge(self):
+        """reloads the files and applies the pending changes back on top
+
+        The caller holds the lock.
+        """
+        pending = dict(self.__pending)
+        self._clear()
+        self._load()
+        for key, obj in pending.items():
+            if obj is None:
+                self._remove(key)
+            else:
+                self._insert(obj)
+        self.__pending.update(pending)
+
+    def _read_header(self):
+        """returns the (generation, version) stored in the version file
+
+        Only shared storages use the version file.
+        """
+        if FileStorage.__header is None:
+            fd = os.open(self.__version_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < 16:
+                    os.ftruncate(fd, 16)
+                FileStorage.__header = mmap.mmap(fd, 16)
+            finally:
+                os.close(fd)
+        return struct.unpack_from("<QQ", self.__header)
+
+    def _bump(self, compacted):
+        """publishes a save to the other processes, under the write lock"""
+        generation, version = self._read_header()
+        if compacted:
+            generation += 1
+        FileStorage.__seen = (generation, version + 1)
+        struct.pack_into("<QQ", self.__header, 0, *self.__seen)
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
             key = obj.__class__.__name__ + '.' + obj.id
             if key in self.__objects:
-                del self.__objects[key]
+                self._remove(key)
+                self.__pending[key] = None
+                self.__fragments.pop(key, None)
+                self._changed(key.split(".", 1)[0])
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
-        self.reload()
+        """brings __objects up to date if the files changed since last time
+
+        Shared storages compare the version file with the version loaded
+        and only pull the new journal records, others reload the files when
+        their inode, mtime or size changed, dropping the objects deleted by
+        other processes and applying the pending changes back on top.
+        """
+        if self.__shared:
+            if self._read_header() == self.__seen:
+                self.__reloads["skipped"] += 1
+            else:
+                self.__reloads["performed"] += 1
+                with self._lock(fcntl.LOCK_SH):
+                    self._pull()
+        elif self._file_stat() == FileStorage.__file_stat:
+            self.__reloads["skipped"] += 1
+        else:
+            self.__reloads["performed"] += 1
+            with self._lock(fcntl.LOCK_SH):
+                self._merge()
+
+    def _file_stat(self):
+        """returns the (inode, mtime, size) of the JSON file and journal"""
+        stats = []
+        for path in (self.__file_path, self.__journal_path):
+            try:
+                st = os.stat(path)
+            except OSError:
+                stats.append(None)
+            else:
+                stats.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return tuple(stats)
+
+    def version(self, cls=None):
+        """returns a number that changes whenever the objects of cls change
+
+        Without cls, the number changes with any object.  None is never
+        returned, close() bringing in the changes of other processes.
+        """
+        if cls is None:
+            return sum(self.__changes.values())
+        if type(cls) is not str:
+            cls = cls.__name__
+        return self.__changes.get(cls, 0)
+
+    def _changed(self, cls_name=None):
+        """counts a change of the objects of a class, or of every class"""
+        for name in [cls_name] if cls_name else classes:
+            self.__changes[name] = self.__changes.get(name, 0) + 1
+
+    def metrics(self):
+        """returns the counters kept by the storage engine"""
+        return {"reloads": dict(self.__reloads),
+                "counts": dict(self.__count_stats)}
 
     def get(self, cls, id):
-        """retrieves an object"""
+        """retrieves an object by a direct lookup of its <class name>.id key"""
         if cls in classes.values() and id and type(id) == str:
-            db_obj = self.all(cls)
-            for key, val in db_obj.items():
-                if key.split(".")[1] == id:
-                    return val
+            key = cls.__name__ + "." + id
+            if self.__unloaded:
+                self._hydrate(cls.__name__, key)
+            return self.__objects.get(key)
         return None
 
+    def page(self, cls, limit, after=None, attr=None, value=None):
+        """returns up to limit objects of cls with an id above after
+
+        The objects come in id order, from the sorted ids of the class or,
+        with attr, of the objects whose foreign key attr equals value.
+        Only the objects of the page are decoded from an indexed snapshot.
+        """
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in classes:
+            return []
+        if attr is None:
+            ids = self._sorted_ids(cls)
+        else:
+            ids = sorted(obj.id for obj in self.related(cls, attr, value))
+        start = bisect_right(ids, after) if after else 0
+        objs = []
+        for obj_id in ids[start:start + limit]:
+            key = cls + "." + obj_id
+            self._hydrate(cls, key)
+            objs.append(self.__classes[cls][key])
+        return objs
+
+    def _sorted_ids(self, cls_name):
+        """returns the sorted ids of a class, kept up to date once built"""
+        ids = self.__sorted.get(cls_name)
+        if ids is None:
+            keys = list(self.__classes.get(cls_name, {}))
+            keys.extend(self.__unloaded.get(cls_name, {}))
+            ids = sorted(key.split(".", 1)[1] for key in keys)
+            self.__sorted[cls_name] = ids
+        return ids
+
+    def all_sorted(self, cls, key="name", attr=None, value=None):
+        """returns the objects of cls ordered by their attribute key
+
+        The order of the class is kept up to date once built, so listing
+        it again costs no sort.  With attr, only the objects whose foreign
+        key attr equals value are listed, sorted from the index.
+        Objects without the attribute come first.
+        """
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in classes:
+            return []
+        if attr is not None:
+            return sorted(self.related(cls, attr, value),
+                          key=lambda obj: (self._order_value(obj, key),
+                                           obj.id))
+        entries = self.__ordered.get((cls, key))
+        if entries is None:
+            self._hydrate(cls)
+            values = {obj.id: self._order_value(obj, key)
+                      for obj in self.__classes.get(cls, {}).values()}
+            entries = (sorted((val, obj_id) for obj_id, val
+                              in values.items()), values)
+            self.__ordered[(cls, key)] = entries
+        partition = self.__classes.get(cls, {})
+        return [partition[cls + "." + obj_id] for val, obj_id in entries[0]]
+
+    def states_tree(self):
+        """returns every state with its cities, as (state, [city, ...])
+
+        The states and the cities of each state come in name order, the
+        cities being grouped by state in one pass.
+        """
+        cities = {}
+        for city in self.all_sorted(City):
+            cities.setdefault(city.state_id, []).append(city)
+        return [(state, cities.get(state.id, []))
+                for state in self.all_sorted(State)]
+
+    def _order(self, cls_name, obj_id, obj=None):
+        """updates the orders of a class for an object, drops it without obj"""
+        for (name, key), (entries, values) in self.__ordered.items():
+            if name != cls_name:
+                continue
+            if obj is not None:
+                value = self._order_value(obj, key)
+            if obj_id in values:
+                i = bisect_left(entries, (values.pop(obj_id), obj_id))
+                del entries[i]
+            if obj is not None:
+                values[obj_id] = value
+                insort(entries, (value, obj_id))
+
+    def _order_value(self, obj, key):
+        """returns the attribute key of obj to order it by
+
+        Values other than strings are ordered by their str(), as a string
+        column of the database would store them, so every value compares.
+        """
+        value = getattr(obj, key, None)
+        if value is None:
+            return ""
+        return value if type(value) is str else str(value)
+
+    def search_places(self, states=None, cities=None, amenities=None):
+        """returns the places of POST /api/v1/places_search
+
+        The places of the cities of states and of cities are merged by key
+        from the foreign key index.  With amenities, the places linked to
+        every amenity are intersected first and only then checked against
+        those cities, or all returned when the cities have no places.
+        Without any filter every place is returned.
+        """
+        if not states and not cities and not amenities:
+            return list(self.all(Place).values())
+        city_ids = []
+        for state_id in states or []:
+            if self.get(State, state_id) is not None:
+                city_ids.extend(city.id for city in
+                                self.related(City, "state_id", state_id))
+        for city_id in cities or []:
+            if self.get(City, city_id) is not None:
+                city_ids.append(city_id)
+        self._hydrate("Place")
+        by_city = self.__related.get(("Place", "city_id"), {})
+        if not amenities:
+            places = {}
+            for city_id in city_ids:
+                places.update(by_city.get(city_id, {}))
+            return list(places.values())
+        places = None
+        for amenity_id in amenities:
+            with_amenity = self._places_with_amenity(amenity_id)
+            if places is None:
+                places = with_amenity
+            else:
+                places = {key: place for key, place in places.items()
+                          if key in with_amenity}
+        if any(city_id in by_city for city_id in city_ids):
+            city_ids = set(city_ids)
+            return [place for place in places.values()
+                    if place.city_id in city_ids]
+        return list(places.values())
+
+    def _places_with_amenity(self, amenity_id):
+        """returns the places linked to an amenity, by key"""
+        amenity = self.get(Amenity, amenity_id)
+        place_id = getattr(amenity, "place_id", None)
+        place = self.get(Place, place_id) if place_id else None
+        if place is None:
+            return {}
+        return {"Place." + place.id: place}
+
     def count(self, cls=None):
-        """counts the number of objects in storage"""
-        obj_data = self.all(cls)
-        if cls in classes.values():
-            obj_data = self.all(cls)
-        return len(obj_data)
+        """counts the number of objects in storage, or of class cls
+
+        The counts of the classes are cached until an object of the class
+        is added or removed.
+        """
+        if cls is None:
+            return sum(self.counts().values())
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in classes:
+            return 0
+        count = self.__counts.get(cls)
+        if count is not None:
+            self.__count_stats["hits"] += 1
+            return count
+        self.__count_stats["misses"] += 1
+        count = (len(self.__classes.get(cls, {})) +
+                 len(self.__unloaded.get(cls, {})))
+        self.__counts[cls] = count
+        return count
+
+    def counts(self):
+        """returns the number of objects of each class, by class name"""
+        return {cls_name: self.count(cls_name) for cls_name in classes}
@@ -36,3 +36,16 @@ class User(BaseModel, Base):
         if name == "password":
             value = hashlib.md5(value.encode('utf-8')).hexdigest()
         super().__setattr__(name, value)
+
+    if models.storage_t != 'db':
+        @property
+        def places(self):
+            """getter attribute returns the list of Place instances"""
+            from models.place import Place
+            return models.storage.related(Place, "user_id", self.id)
+
+        @property
+        def reviews(self):
+            """getter attribute returns the list of Review instances"""
+            from models.review import Review
+            return models.storage.related(Review, "user_id", self.id)
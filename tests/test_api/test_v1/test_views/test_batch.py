@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+Contains the TestBatchDocs and TestBatch classes
+"""
+
+from api.v1.app import app
+from api.v1.views import batch
+import inspect
+import models
+from models.state import State
+import pep8
+import unittest
+from unittest.mock import patch
+
+
+class TestBatchDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the batch view"""
+    def test_pep8_conformance_batch(self):
+        """Test that api/v1/views/batch.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/batch.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_batch(self):
+        """Test that tests/test_api/test_v1/test_views/test_batch.py
+        conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_v1/test_views/\
+test_batch.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_batch_func_docstrings(self):
+        """Test for the presence of docstrings in the batch functions"""
+        for name, func in inspect.getmembers(batch, inspect.isfunction):
+            if func.__module__ == batch.__name__:
+                self.assertTrue(func.__doc__,
+                                "{:s} needs a docstring".format(name))
+
+
+class TestBatch(unittest.TestCase):
+    """Test the POST /api/v1/batch endpoint"""
+    def setUp(self):
+        """Creates a test client and a stored state"""
+        self.client = app.test_client()
+        state = State(name="California")
+        state.save()
+        self.state_id = state.id
+
+    def tearDown(self):
+        """Deletes the states the tests stored"""
+        for state in models.storage.all(State).values():
+            if state.name in ("California", "Nevada", "Arizona"):
+                models.storage.delete(state)
+        models.storage.save()
+
+    def post(self, operations):
+        """posts operations to the endpoint, returns the response"""
+        return self.client.post("/api/v1/batch", json=operations)
+
+    def test_not_a_list(self):
+        """Test that a body other than a list is rejected"""
+        response = self.post({"op": "create"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {"error": "Not a list"})
+
+    def test_operations(self):
+        """Test that each operation is applied and listed with its status"""
+        response = self.post([
+            {"op": "create", "class": "State", "data": {"name": "Nevada"}},
+            {"op": "update", "class": "State", "id": self.state_id,
+             "data": {"name": "Arizona"}},
+            {"op": "create", "class": "State", "data": {}},
+            {"op": "delete", "class": "State", "id": "missing"}])
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()
+        self.assertEqual([result["status"] for result in results],
+                         [201, 200, 400, 404])
+        created = models.storage.get(State, results[0]["object"]["id"])
+        self.assertEqual(created.name, "Nevada")
+        self.assertEqual(models.storage.get(State, self.state_id).name,
+                         "Arizona")
+
+    def test_create_existing_id(self):
+        """Test that a creation reusing a stored id is rejected"""
+        response = self.post([
+            {"op": "create", "class": "State",
+             "data": {"id": self.state_id, "name": "Nevada"}},
+            {"op": "create", "class": "State",
+             "data": {"id": 5, "name": "Nevada"}},
+            {"op": "create", "class": "State",
+             "data": {"created_at": "bad", "name": "Nevada"}}])
+        self.assertEqual([result["status"] for result in response.get_json()],
+                         [409, 400, 400])
+        self.assertEqual(models.storage.get(State, self.state_id).name,
+                         "California")
+
+    def test_save_failure(self):
+        """Test that a failed save is rolled back and reported"""
+        with patch.object(models.storage, "save", side_effect=OSError):
+            response = self.post([
+                {"op": "create", "class": "State",
+                 "data": {"name": "Nevada"}},
+                {"op": "delete", "class": "State", "id": self.state_id},
+                {"op": "delete", "class": "State", "id": "missing"}])
+        self.assertEqual(response.status_code, 500)
+        results = response.get_json()
+        self.assertEqual([result["status"] for result in results],
+                         [500, 500, 404])
+        self.assertEqual(results[0]["error"], "Not saved: OSError")
+        self.assertIsNotNone(models.storage.get(State, self.state_id))
+        names = [state.name for state in models.storage.all(State).values()]
+        self.assertNotIn("Nevada", names)
+
+
+if __name__ == '__main__':
+    unittest.main()
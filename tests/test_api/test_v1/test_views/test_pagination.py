@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""
+Contains the TestPaginationDocs and TestPagination classes
+"""
+
+from api.v1.app import app
+from api.v1.views import pagination
+import inspect
+import json
+import models
+from models.city import City
+from models.state import State
+import pep8
+import unittest
+
+
+class TestPaginationDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the pagination module"""
+    def test_pep8_conformance_pagination(self):
+        """Test that api/v1/views/pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_pagination(self):
+        """Test that tests/test_api/test_v1/test_views/test_pagination.py
+        conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_v1/test_views/\
+test_pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pagination_func_docstrings(self):
+        """Test for the presence of docstrings in the pagination functions"""
+        for name, func in inspect.getmembers(pagination, inspect.isfunction):
+            if func.__module__ == pagination.__name__:
+                self.assertTrue(func.__doc__,
+                                "{:s} needs a docstring".format(name))
+
+
+class TestPagination(unittest.TestCase):
+    """Test the pages of GET /api/v1/states/<state_id>/cities"""
+    def setUp(self):
+        """Creates a test client and a state with three cities"""
+        self.client = app.test_client()
+        state = State(name="Paged")
+        state.save()
+        self.state_id = state.id
+        for name in ["Napa", "Fresno", "Tahoe"]:
+            City(name=name, state_id=state.id).save()
+        self.url = "/api/v1/states/{}/cities".format(self.state_id)
+
+    def tearDown(self):
+        """Deletes the state and the cities the tests stored"""
+        for city in models.storage.all(City).values():
+            if city.state_id == self.state_id:
+                models.storage.delete(city)
+        models.storage.delete(models.storage.get(State, self.state_id))
+        models.storage.save()
+
+    def test_invalid_args(self):
+        """Test that an invalid limit or sort is rejected"""
+        for query, error in [("limit=0", "Invalid limit"),
+                             ("limit=x", "Invalid limit"),
+                             ("sort=id", "Invalid sort"),
+                             ("sort=name&limit=2", "Invalid sort")]:
+            with self.subTest(query=query):
+                response = self.client.get(self.url + "?" + query)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json(), {"error": error})
+        response = self.client.get("/api/v1/users?sort=name")
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages(self):
+        """Test that the pages follow each other through the cursor"""
+        response = self.client.get(self.url + "?limit=2")
+        first = response.get_json()
+        self.assertEqual(len(first), 2)
+        self.assertLess(first[0]["id"], first[1]["id"])
+        self.assertEqual(response.headers["X-Next-Cursor"], first[1]["id"])
+        link = response.headers["Link"]
+        self.assertTrue(link.startswith("<" + self.url + "?"))
+        self.assertTrue(link.endswith('>; rel="next"'))
+        response = self.client.get(link[1:link.index(">")])
+        last = response.get_json()
+        self.assertEqual(len(last), 1)
+        self.assertGreater(last[0]["id"], first[1]["id"])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+        self.assertNotIn("Link", response.headers)
+
+    def test_sorted_stream(self):
+        """Test that ?sort=name streams the collection in name order"""
+        response = self.client.get(self.url + "?sort=name&stream=1")
+        self.assertTrue(response.is_streamed)
+        cities = json.loads(response.get_data())
+        self.assertEqual([city["name"] for city in cities],
+                         ["Fresno", "Napa", "Tahoe"])
+        response = self.client.get(self.url + "?stream=1")
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(sorted(city["name"] for city
+                                in json.loads(response.get_data())),
+                         ["Fresno", "Napa", "Tahoe"])
+
+
+if __name__ == '__main__':
+    unittest.main()
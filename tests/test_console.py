@@ -1,12 +1,21 @@
 #!/usr/bin/python3
 """
-Contains the class TestConsoleDocs
+Contains the classes TestConsoleDocs and TestHBNBCommand
 """
 
 import console
+import hashlib
 import inspect
+import io
+import json
+import models
+from models.state import State
+from models.user import User
+import os
 import pep8
+import tempfile
 import unittest
+from unittest.mock import patch
 HBNBCommand = console.HBNBCommand
 
 
@@ -39,3 +48,89 @@ class TestConsoleDocs(unittest.TestCase):
                          "HBNBCommand class needs a docstring")
         self.assertTrue(len(HBNBCommand.__doc__) >= 1,
                         "HBNBCommand class needs a docstring")
+
+
+class TestHBNBCommand(unittest.TestCase):
+    """Class for testing the commands of the console"""
+    def run_commands(self, *lines):
+        """runs the lines through a console and returns its output"""
+        cons = HBNBCommand()
+        with patch('sys.stdout', new=io.StringIO()) as out:
+            for line in lines:
+                cons.onecmd(line)
+        return out.getvalue()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_batch_saves_once(self):
+        """Test that the changes of a batch are saved by commit only"""
+        cons = HBNBCommand()
+        with patch.object(models.storage, 'save') as save, \
+                patch('sys.stdout', new=io.StringIO()) as out:
+            cons.onecmd('begin')
+            cons.onecmd('create State name="A"')
+            cons.onecmd('create State name="B"')
+            self.assertEqual(save.call_count, 0)
+            cons.onecmd('commit')
+            self.assertEqual(save.call_count, 1)
+        self.assertIn("Saved 2 objects", out.getvalue())
+        for state_id in out.getvalue().split()[:2]:
+            models.storage.delete(models.storage.get(State, state_id))
+        self.assertEqual(self.run_commands('commit'),
+                         "** no batch started **\n")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_load(self):
+        """Test that load creates the instances of a JSON lines file"""
+        lines = [json.dumps({"__class__": "State", "name": "Loaded",
+                             "id": "load-test"}), "{bad", "",
+                 json.dumps({"__class__": "State", "created_at": "bad"}),
+                 json.dumps({"__class__": "State", "id": 5}),
+                 json.dumps({"__class__": "User", "id": "load-user",
+                             "email": "load@hbnb.io", "password": "pwd"})]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl",
+                                         delete=False) as f:
+            f.write("\n".join(lines))
+        try:
+            out = self.run_commands('load ' + f.name)
+        finally:
+            os.remove(f.name)
+        for n in [2, 4, 5]:
+            self.assertIn("** invalid line {} **".format(n), out)
+        self.assertIn("Loaded 2 objects", out)
+        state = models.storage.get(State, "load-test")
+        self.assertEqual(state.name, "Loaded")
+        user = models.storage.get(User, "load-user")
+        self.assertEqual(user.password, hashlib.md5(b"pwd").hexdigest())
+        models.storage.delete(state)
+        models.storage.delete(user)
+        models.storage.save()
+        self.assertEqual(self.run_commands('load'),
+                         "** file name missing **\n")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_filters(self):
+        """Test that all prints the instances of --class up to --limit"""
+        states = [State(name=name) for name in ["A", "B", "C"]]
+        for state in states:
+            models.storage.new(state)
+        count = models.storage.count(State)
+        out = self.run_commands('all --class=State')
+        self.assertEqual(out.count("[State]"), count)
+        self.assertTrue(out.startswith("[[State]"))
+        self.assertEqual(self.run_commands('all State --limit 2')
+                         .count("[State]"), 2)
+        self.assertEqual(self.run_commands('all --limit=0'), "[]\n")
+        self.assertEqual(self.run_commands('all --limit=x'),
+                         "** invalid limit **\n")
+        for state in states:
+            models.storage.delete(state)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_count(self):
+        """Test that count prints the number of instances"""
+        self.assertEqual(self.run_commands('count'),
+                         "{}\n".format(models.storage.count()))
+        self.assertEqual(self.run_commands('count --class=State'),
+                         "{}\n".format(models.storage.count(State)))
+        self.assertEqual(self.run_commands('count Nope'),
+                         "** class doesn't exist **\n")
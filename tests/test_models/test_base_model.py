@@ -138,6 +138,16 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(new_d["created_at"], bm.created_at.strftime(t_format))
         self.assertEqual(new_d["updated_at"], bm.updated_at.strftime(t_format))
 
+    def test_from_storage(self):
+        """Test that from_storage rebuilds the instance to_dict came from"""
+        inst = BaseModel()
+        inst.name = "Holberton"
+        new_inst = BaseModel.from_storage(inst.to_dict())
+        self.assertIs(type(new_inst), BaseModel)
+        self.assertEqual(new_inst.__dict__, inst.__dict__)
+        self.assertNotIn("__class__", new_inst.__dict__)
+        self.assertIs(type(new_inst.created_at), datetime)
+
     def test_str(self):
         """test that the str method has the correct output"""
         inst = BaseModel()
@@ -17,6 +17,7 @@ from models.user import User
 import json
 import os
 import pep8
+from sqlalchemy import event
 import unittest
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
@@ -104,7 +105,7 @@ class TestDBStorage(unittest.TestCase):
     def test_count_all(self):
         """Test the count method with no class argument"""
         initial_count = models.storage.count()
-        instance = User()
+        instance = User(email="count@hbnb.io", password="pwd")
         instance.save()
         n_count = models.storage.count()
         self.assertEqual(initial_count + 1, n_count)
@@ -113,7 +114,7 @@ class TestDBStorage(unittest.TestCase):
     def test_count_by_class(self):
         """Test the count method with class argument"""
         initial_count = models.storage.count(User)
-        instance = User()
+        instance = User(email="count@hbnb.io", password="pwd")
         instance.save()
         n_count = models.storage.count(User)
         self.assertEqual(initial_count + 1, n_count)
@@ -124,6 +125,121 @@ class TestDBStorage(unittest.TestCase):
         non_existent_count = models.storage.count('NonExistentClass')
         self.assertEqual(non_existent_count, 0)
 
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_counts(self):
+        """Test that counts matches count for every class"""
+        initial_counts = models.storage.counts()
+        State(name="California").save()
+        User(email="counts@hbnb.io", password="pwd").save()
+        counts = models.storage.counts()
+        self.assertEqual(counts["State"], initial_counts["State"] + 1)
+        self.assertEqual(counts["User"], initial_counts["User"] + 1)
+        for class_name, n_count in counts.items():
+            self.assertEqual(models.storage.count(class_name), n_count)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_counts_other_writer(self):
+        """Test that counts are only cached with HBNB_CACHE_TTL"""
+        engine = models.storage._DBStorage__engine
+        table = State.__table__
+        row = {"id": "counts-other-writer", "name": "Elsewhere",
+               "created_at": datetime.utcnow(),
+               "updated_at": datetime.utcnow()}
+        saved_ttl = models.storage._DBStorage__cache_ttl
+        try:
+            for ttl, added in [(0, 1), (60, 0)]:
+                models.storage._DBStorage__cache_ttl = ttl
+                models.storage._DBStorage__counts.clear()
+                initial_count = models.storage.count(State)
+                with engine.begin() as conn:
+                    conn.execute(table.insert().values(**row))
+                models.storage.close()
+                with self.subTest(ttl=ttl):
+                    self.assertEqual(models.storage.count(State),
+                                     initial_count + added)
+                with engine.begin() as conn:
+                    conn.execute(table.delete().where(
+                        table.c.id == row["id"]))
+                models.storage.close()
+        finally:
+            models.storage._DBStorage__cache_ttl = saved_ttl
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_version(self):
+        """Test that version is None unless HBNB_CACHE_TTL is set"""
+        saved_ttl = models.storage._DBStorage__cache_ttl
+        try:
+            models.storage._DBStorage__cache_ttl = 0
+            self.assertIsNone(models.storage.version())
+            self.assertIsNone(models.storage.version(State))
+            models.storage._DBStorage__cache_ttl = 60
+            version = models.storage.version(State)
+            city_version = models.storage.version(City)
+            self.assertEqual(models.storage.version(State), version)
+            State(name="California").save()
+            self.assertNotEqual(models.storage.version(State), version)
+            self.assertEqual(models.storage.version(City), city_version)
+        finally:
+            models.storage._DBStorage__cache_ttl = saved_ttl
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_metrics_pool(self):
+        """Test that metrics reports the connection pool"""
+        pool = models.storage.metrics()["pool"]
+        self.assertIn("checkedout", pool)
+        self.assertIn("size", pool)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_single_query_paths(self):
+        """Test that states_tree and search_places run a single query"""
+        state = State(name="California")
+        models.storage.new(state)
+        for name in ["Fresno", "Napa", "Oakland"]:
+            models.storage.new(City(name=name, state_id=state.id))
+        models.storage.save()
+        models.storage.close()
+        queries = []
+
+        def count(conn, cursor, statement, *args):
+            """records the statements executed"""
+            queries.append(statement)
+
+        engine = models.storage._DBStorage__engine
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            tree = {st.id: cities for st, cities
+                    in models.storage.states_tree()}
+            self.assertEqual([city.name for city in tree[state.id]],
+                             ["Fresno", "Napa", "Oakland"])
+            self.assertEqual(len(queries), 1)
+            queries.clear()
+            models.storage.search_places([state.id])
+            self.assertEqual(len(queries), 1)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_search_places(self):
+        """Test that search_places filters by state, city and amenity"""
+        user = User(email="search@hbnb.io", password="pwd")
+        state = State(name="California")
+        other_state = State(name="Arizona")
+        city = City(name="Fresno", state_id=state.id)
+        other = City(name="Tucson", state_id=other_state.id)
+        place = Place(name="Loft", city_id=city.id, user_id=user.id)
+        far = Place(name="House", city_id=other.id, user_id=user.id)
+        wifi = Amenity(name="Wifi")
+        far.amenities.append(wifi)
+        for obj in [user, state, other_state, city, other, place, far, wifi]:
+            models.storage.new(obj)
+        models.storage.save()
+        search = models.storage.search_places
+        self.assertEqual(search([state.id]), [place])
+        self.assertEqual(sorted(search([state.id], [other.id]),
+                                key=lambda plc: plc.name), [far, place])
+        self.assertEqual(search(None, None, [wifi.id]), [far])
+        self.assertEqual(search([state.id], [], [wifi.id]), [])
+        self.assertEqual(search(None, None, [wifi.id, "unknown"]), [])
 
 if __name__ == '__main__':
     unittest.main()
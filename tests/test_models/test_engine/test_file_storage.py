@@ -15,8 +15,10 @@ from models.review import Review
 from models.state import State
 from models.user import User
 import json
+import multiprocessing
 import os
 import pep8
+import tempfile
 import unittest
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
@@ -92,8 +94,32 @@ class TestFileStorage(unittest.TestCase):
                 storage.new(instance)
                 test_dict[instance_key] = instance
                 self.assertEqual(test_dict, storage._FileStorage__objects)
+        # the class partitions and the indexes are not swapped with
+        # __objects, drop the instances from them before restoring it
+        for instance in test_dict.values():
+            storage.delete(instance)
         FileStorage._FileStorage__objects = save
 
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_by_class(self):
+        """Test that all(cls) only returns the objects of that class"""
+        storage = FileStorage()
+        state = State()
+        city = City()
+        storage.new(state)
+        storage.new(city)
+        for cls in [State, "State"]:
+            with self.subTest(cls=cls):
+                states = storage.all(cls)
+                self.assertIn("State." + state.id, states)
+                self.assertNotIn("City." + city.id, states)
+                for value in states.values():
+                    self.assertIs(type(value), State)
+        storage.delete(state)
+        storage.delete(city)
+        self.assertNotIn("State." + state.id, storage.all(State))
+        self.assertEqual(storage.count(State), len(storage.all(State)))
+
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_save(self):
         """Test that save properly saves objects to file.json"""
@@ -114,6 +140,348 @@ class TestFileStorage(unittest.TestCase):
             js = f.read()
         self.assertEqual(json.loads(string), json.loads(js))
 
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_skips_unchanged_file(self):
+        """Test that close only reloads when file.json changed on disk"""
+        storage = FileStorage()
+        storage.save()
+        before = storage.metrics()["reloads"]
+        storage.close()
+        after = storage.metrics()["reloads"]
+        self.assertEqual(after["skipped"], before["skipped"] + 1)
+        self.assertEqual(after["performed"], before["performed"])
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        state = State()
+        js["State." + state.id] = state.to_dict()
+        with open("file.json", "w") as f:
+            json.dump(js, f)
+        storage.close()
+        after = storage.metrics()["reloads"]
+        self.assertEqual(after["performed"], before["performed"] + 1)
+        self.assertIsNotNone(storage.get(State, state.id))
+        storage.delete(storage.get(State, state.id))
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_drops_other_process_deletions(self):
+        """Test that close forgets an object another process deleted"""
+        storage = FileStorage()
+        gone = State(name="California")
+        storage.new(gone)
+        storage.save()
+        context = multiprocessing.get_context("fork")
+        child = context.Process(target=lambda: (storage.delete(gone),
+                                                storage.save()))
+        child.start()
+        child.join()
+        storage.close()
+        self.assertIsNone(storage.get(State, gone.id))
+        kept = State(name="Nevada")
+        storage.new(kept)
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertNotIn("State." + gone.id, js)
+        self.assertIn("State." + kept.id, js)
+        storage.delete(kept)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_keeps_other_process_changes(self):
+        """Test that save merges a file.json rewritten by another process"""
+        storage = FileStorage()
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        theirs = State(name="Nevada")
+        js["State." + theirs.id] = theirs.to_dict()
+        with open("file.json", "w") as f:
+            json.dump(js, f)
+        ours = State(name="California")
+        storage.new(ours)
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertIn("State." + theirs.id, js)
+        self.assertIn("State." + ours.id, js)
+        self.assertIs(storage.get(State, ours.id), ours)
+        storage.delete(ours)
+        storage.delete(storage.get(State, theirs.id))
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_reencodes_dirty_objects_only(self):
+        """Test that save reuses the JSON of objects that did not change"""
+        storage = FileStorage()
+        changed = State(name="California")
+        clean = State(name="Arizona")
+        storage.new(changed)
+        storage.new(clean)
+        storage.save()
+        changed.name = "Nevada"
+        clean.__dict__["name"] = "not seen by the storage"
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["State." + changed.id]["name"], "Nevada")
+        self.assertEqual(js["State." + clean.id]["name"], "Arizona")
+        storage.delete(changed)
+        storage.delete(clean)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_journal(self):
+        """Test that journal mode appends changes and reload replays them"""
+        storage = FileStorage()
+        storage.save()
+        with open("file.json", "r") as f:
+            snapshot = f.read()
+        FileStorage._FileStorage__journal = True
+        try:
+            state = State(name="California")
+            storage.new(state)
+            storage.save()
+            state.name = "Nevada"
+            storage.save()
+            with open("file.json", "r") as f:
+                self.assertEqual(f.read(), snapshot)
+            with open("file.json.journal", "r") as f:
+                self.assertEqual(len(f.readlines()), 2)
+            storage.delete(state)
+            storage.reload()
+            self.assertEqual(storage.get(State, state.id).name, "Nevada")
+            storage.delete(storage.get(State, state.id))
+            storage.save()
+            storage.reload()
+            self.assertIsNone(storage.get(State, state.id))
+        finally:
+            FileStorage._FileStorage__journal = False
+        storage.save()
+        self.assertFalse(os.path.exists("file.json.journal"))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_ignores_torn_journal_line(self):
+        """Test that reload skips a journal line cut short by a crash"""
+        storage = FileStorage()
+        storage.save()
+        state = State(name="California")
+        record = json.dumps({"key": "State." + state.id,
+                             "value": state.to_dict()})
+        with open("file.json.journal", "w") as f:
+            f.write(record[:len(record) // 2])
+        try:
+            storage.reload()
+            self.assertIsNone(storage.get(State, state.id))
+        finally:
+            os.remove("file.json.journal")
+        leftovers = [name for name in os.listdir(".")
+                     if name.startswith(".file.json.")]
+        self.assertEqual(leftovers, [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_shared_pulls_other_process_changes(self):
+        """Test that close pulls the changes saved by another process"""
+        storage = FileStorage()
+        FileStorage._FileStorage__shared = True
+        FileStorage._FileStorage__journal = True
+        try:
+            storage.save()
+            state = State(name="California")
+            context = multiprocessing.get_context("fork")
+            child = context.Process(target=lambda: state.save())
+            child.start()
+            child.join()
+            self.assertIsNone(storage.get(State, state.id))
+            storage.close()
+            self.assertEqual(storage.get(State, state.id).name, "California")
+            storage.close()
+            self.assertGreater(storage.metrics()["reloads"]["skipped"], 0)
+            storage.delete(storage.get(State, state.id))
+        finally:
+            FileStorage._FileStorage__shared = False
+            FileStorage._FileStorage__journal = False
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_creates_no_file(self):
+        """Test that reload leaves a directory without file.json untouched"""
+        storage = FileStorage()
+        cwd = os.getcwd()
+        os.chdir(tempfile.mkdtemp())
+        try:
+            storage.reload()
+            storage.close()
+            self.assertEqual(os.listdir("."), [])
+        finally:
+            os.chdir(cwd)
+            storage.reload()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_indexed_format_decodes_lazily(self):
+        """Test that an indexed snapshot is only decoded when accessed"""
+        storage = FileStorage()
+        state = State(name="California")
+        storage.new(state)
+        FileStorage._FileStorage__format = "indexed"
+        try:
+            storage.save()
+            count = storage.count(State)
+            FileStorage._FileStorage__objects.clear()
+            FileStorage._FileStorage__classes.clear()
+            storage.reload()
+            self.assertEqual(storage.count(State), count)
+        finally:
+            FileStorage._FileStorage__format = "json"
+        self.assertEqual(len(FileStorage._FileStorage__objects), 0)
+        self.assertEqual(storage.get(State, state.id).name, "California")
+        self.assertEqual(len(FileStorage._FileStorage__objects), 1)
+        self.assertEqual(len(storage.all(State)), count)
+        storage.delete(storage.get(State, state.id))
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertNotIn("State." + state.id, json.load(f))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_iter(self):
+        """Test that iter yields the objects of a class one at a time"""
+        storage = FileStorage()
+        amenities = [Amenity(name=str(i)) for i in range(3)]
+        for amenity in amenities:
+            storage.new(amenity)
+        objs = storage.iter(Amenity)
+        self.assertNotIsInstance(objs, (list, dict))
+        self.assertEqual(set(objs), set(storage.all(Amenity).values()))
+        self.assertEqual(set(storage.iter("Amenity")),
+                         set(storage.all(Amenity).values()))
+        self.assertEqual(len(list(storage.iter())), storage.count())
+        for amenity in amenities:
+            storage.delete(amenity)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_related(self):
+        """Test that related follows the changes of the foreign keys"""
+        storage = FileStorage()
+        state = State(name="California")
+        other = State(name="Nevada")
+        city = City(name="Fresno", state_id=state.id)
+        for obj in [state, other, city]:
+            storage.new(obj)
+        self.assertEqual(storage.related(City, "state_id", state.id), [city])
+        self.assertEqual(state.cities, [city])
+        city.state_id = other.id
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other.cities, [city])
+        storage.delete(city)
+        self.assertEqual(storage.related("City", "state_id", other.id), [])
+        storage.delete(state)
+        storage.delete(other)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_page(self):
+        """Test that page walks the objects of a class in id order"""
+        storage = FileStorage()
+        amenities = [Amenity(name=str(i)) for i in range(5)]
+        for amenity in amenities:
+            storage.new(amenity)
+        ids = sorted(storage.all(Amenity).values(), key=lambda obj: obj.id)
+        self.assertEqual(storage.page(Amenity, 2), ids[:2])
+        self.assertEqual(storage.page(Amenity, 2, ids[1].id), ids[2:4])
+        storage.delete(ids[2])
+        self.assertEqual(storage.page(Amenity, 2, ids[1].id), ids[3:5])
+        storage.new(ids[2])
+        self.assertEqual(storage.page("Amenity", 1, ids[1].id), [ids[2]])
+        city = City(state_id="state")
+        storage.new(city)
+        self.assertEqual(storage.page(City, 5, None, "state_id", "state"),
+                         [city])
+        for obj in amenities + [city]:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_sorted(self):
+        """Test that all_sorted keeps the objects of a class in name order"""
+        storage = FileStorage()
+        amenities = [Amenity(name=name) for name in ["Wifi", "Bath", "Oven"]]
+        for amenity in amenities:
+            storage.new(amenity)
+
+        def names():
+            """returns the names of the amenities, in order"""
+            return [obj.name for obj in storage.all_sorted(Amenity)
+                    if obj in amenities]
+
+        self.assertEqual(names(), ["Bath", "Oven", "Wifi"])
+        amenities[0].name = "Attic"
+        self.assertEqual(names(), ["Attic", "Bath", "Oven"])
+        storage.delete(amenities[1])
+        self.assertEqual(names(), ["Attic", "Oven"])
+        city = City(name="Napa", state_id="state")
+        other = City(name="Fresno", state_id="state")
+        storage.new(city)
+        storage.new(other)
+        self.assertEqual(storage.all_sorted("City", "name", "state_id",
+                                            "state"), [other, city])
+        for obj in amenities + [city, other]:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_sorted_mixed_types(self):
+        """Test that all_sorted keeps an object whose name is not a string"""
+        storage = FileStorage()
+        amenities = [Amenity(name=name) for name in ["Wifi", "Bath"]]
+        for amenity in amenities:
+            storage.new(amenity)
+        storage.all_sorted(Amenity)
+        amenities[0].name = 5
+        amenities.append(Amenity(name=None))
+        storage.new(amenities[-1])
+        self.assertEqual([obj for obj in storage.all_sorted(Amenity)
+                          if obj in amenities],
+                         [amenities[2], amenities[0], amenities[1]])
+        for amenity in amenities:
+            storage.delete(amenity)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_states_tree(self):
+        """Test that states_tree groups the cities under their state"""
+        storage = FileStorage()
+        state = State(name="California")
+        napa = City(name="Napa", state_id=state.id)
+        fresno = City(name="Fresno", state_id=state.id)
+        empty = State(name="Nevada")
+        objs = [state, napa, fresno, empty]
+        for obj in objs:
+            storage.new(obj)
+        tree = dict(storage.states_tree())
+        self.assertEqual(tree[state], [fresno, napa])
+        self.assertEqual(tree[empty], [])
+        for obj in objs:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_search_places(self):
+        """Test that search_places filters by state, city and amenity"""
+        storage = FileStorage()
+        state = State(name="California")
+        city = City(name="Fresno", state_id=state.id)
+        other = City(name="Tucson", state_id="another state")
+        place = Place(name="Loft", city_id=city.id)
+        far = Place(name="House", city_id=other.id)
+        wifi = Amenity(name="Wifi", place_id=far.id)
+        objs = [state, city, other, place, far, wifi]
+        for obj in objs:
+            storage.new(obj)
+        self.assertEqual(storage.search_places([state.id]), [place])
+        self.assertEqual(storage.search_places([state.id], [other.id]),
+                         [place, far])
+        self.assertEqual(storage.search_places(None, None, [wifi.id]), [far])
+        self.assertEqual(storage.search_places([state.id], [], [wifi.id]),
+                         [])
+        self.assertEqual(storage.search_places(None, None, ["unknown"]), [])
+        for obj in objs:
+            storage.delete(obj)
+
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_get(self):
         """Test the get method"""
@@ -150,6 +518,54 @@ class TestFileStorage(unittest.TestCase):
         non_existent_count = models.storage.count('NonExistentClass')
         self.assertEqual(non_existent_count, 0)
 
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_counts(self):
+        """Test that counts matches count for every class"""
+        instance = User()
+        instance.save()
+        counts = models.storage.counts()
+        self.assertGreaterEqual(counts["User"], 1)
+        for class_name, n_count in counts.items():
+            self.assertEqual(models.storage.count(class_name), n_count)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_count_cached_until_changed(self):
+        """Test that counts are cached until an object is added or removed"""
+        storage = FileStorage()
+        count = storage.count(State)
+        before = storage.metrics()["counts"]
+        self.assertEqual(storage.count(State), count)
+        after = storage.metrics()["counts"]
+        self.assertEqual(after["hits"], before["hits"] + 1)
+        self.assertEqual(after["misses"], before["misses"])
+        state = State()
+        storage.new(state)
+        self.assertEqual(storage.count(State), count + 1)
+        self.assertEqual(storage.metrics()["counts"]["misses"],
+                         before["misses"] + 1)
+        storage.delete(state)
+        self.assertEqual(storage.count(State), count)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_version(self):
+        """Test that version changes with every change of the objects"""
+        storage = FileStorage()
+        version = storage.version()
+        self.assertEqual(storage.version(), version)
+        state = State(name="California")
+        storage.new(state)
+        self.assertNotEqual(storage.version(), version)
+        version = storage.version()
+        state.name = "Nevada"
+        self.assertNotEqual(storage.version(), version)
+        version = storage.version()
+        storage.delete(state)
+        self.assertNotEqual(storage.version(), version)
+        city_version = storage.version(City)
+        storage.new(state)
+        self.assertEqual(storage.version(City), city_version)
+        self.assertNotEqual(storage.version(State), storage.version())
+        storage.delete(state)
 
 if __name__ == '__main__':
     unittest.main()
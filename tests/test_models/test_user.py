@@ -125,6 +125,14 @@ class TestUser(unittest.TestCase):
         self.assertEqual(new_d["created_at"], u.created_at.strftime(t_format))
         self.assertEqual(new_d["updated_at"], u.updated_at.strftime(t_format))
 
+    def test_to_dict_password(self):
+        """test that to_dict only keeps the password for the file storage"""
+        u = User(email="a@b.c", password="pwd")
+        self.assertNotIn("password", u.to_dict())
+        self.assertEqual(u.to_dict(fs_save=True)["password"], u.password)
+        attrs = [attr for attr in u.__dict__ if attr != "_sa_instance_state"]
+        self.assertEqual(list(u.to_dict(fs_save=True))[:-1], attrs)
+
     def test_str(self):
         """test that the str method has the correct output"""
         user = User()
@@ -6,15 +6,17 @@ starts a Flask web application
 from flask import Flask, render_template
 from models import *
 from models import storage
+from web_flask.page_cache import cached
 app = Flask(__name__)
 
 
 @app.route('/hbnb_filters', strict_slashes=False)
+@cached
 def filters():
     """display a HTML page like 6-index.html from static"""
-    states = storage.all("State").values()
-    amenities = storage.all("Amenity").values()
-    return render_template('10-hbnb_filters.html', states=states,
+    tree = storage.states_tree()
+    amenities = storage.all_sorted("Amenity")
+    return render_template('10-hbnb_filters.html', tree=tree,
                            amenities=amenities)
 
 
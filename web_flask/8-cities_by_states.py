@@ -6,14 +6,16 @@ starts a Flask web application
 from flask import Flask, render_template
 from models import *
 from models import storage
+from web_flask.page_cache import cached
 app = Flask(__name__)
 
 
 @app.route('/cities_by_states', strict_slashes=False)
+@cached
 def cities_by_states():
     """display the states and cities listed in alphabetical order"""
-    states = storage.all("State").values()
-    return render_template('8-cities_by_states.html', states=states)
+    tree = storage.states_tree()
+    return render_template('8-cities_by_states.html', tree=tree)
 
 
 @app.teardown_appcontext
@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+"""
+Caches the HTML rendered by the views until the storage changes
+"""
+from functools import wraps
+from hashlib import sha1
+
+from flask import make_response, request
+
+from models import storage
+
+# dictionary - (storage version, ETag, HTML) by (endpoint, view arguments)
+pages = {}
+# int - number of pages kept, the oldest is dropped past it
+MAX_PAGES = 1024
+
+
+def cached(view):
+    """
+    Decorates a view to serve the HTML it rendered last with the same
+    arguments, for as long as storage.version() is unchanged.  Nothing is
+    cached while storage.version() is None.
+    The page is sent with its ETag, and a 304 is answered to a request
+    whose If-None-Match matches it.
+    """
+    @wraps(view)
+    def wrapper(**kwargs):
+        """returns the cached page, rendering it first when stale"""
+        version = storage.version()
+        if version is None:
+            return view(**kwargs)
+        key = (request.endpoint, tuple(sorted(kwargs.items())))
+        page = pages.get(key)
+        if page is None or page[0] != version:
+            html = view(**kwargs)
+            page = (version, sha1(html.encode()).hexdigest(), html)
+            pages.pop(key, None)
+            if len(pages) >= MAX_PAGES:
+                del pages[next(iter(pages))]
+            pages[key] = page
+        response = make_response(page[2])
+        response.set_etag(page[1])
+        return response.make_conditional(request)
+    return wrapper